@@ -0,0 +1,95 @@
+import os
+import sys
+import time
+import shutil
+from datetime import datetime
+
+import fire
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'test_projects', 'example'))
+
+from hypergol import DatasetFactory                 # pylint: disable=wrong-import-position
+from hypergol import RepoData                       # pylint: disable=wrong-import-position
+from data_models.token import Token                 # pylint: disable=wrong-import-position,import-error
+from data_models.sentence import Sentence           # pylint: disable=wrong-import-position,import-error
+from data_models.article import Article             # pylint: disable=wrong-import-position,import-error
+from data_models.article_page import ArticlePage    # pylint: disable=wrong-import-position,import-error
+
+SERIALIZERS = ['json', 'orjson', 'msgpack']
+
+
+def create_article(articleId, sentenceCount=20, tokenCount=25):
+    sentences = []
+    for sentenceId in range(sentenceCount):
+        tokens = [
+            Token(i=i, startChar=i * 6, endChar=i * 6 + 5, depType='nsubj', depHead=0, depLeftEdge=0, depRightEdge=i, posType='NOUN', posFineType='NN', lemma=f'lemma{i}', text=f'Token{i}')
+            for i in range(tokenCount)
+        ]
+        sentences.append(Sentence(startChar=0, endChar=tokenCount * 6, articleId=articleId, sentenceId=sentenceId, tokens=tokens))
+    return Article(articleId=articleId, url=f'https://example.com/{articleId}', title=f'Title {articleId}', text='Lorem ipsum ' * 200, publishDate=datetime(2020, 1, 1), sentences=sentences)
+
+
+def create_article_page(articlePageId):
+    return ArticlePage(articlePageId=articlePageId, url=f'https://example.com/{articlePageId}', body='<html><body><p>Lorem ipsum</p></body></html>' * 100)
+
+
+def _time_dataset(datasetFactory, dataType, name, serializer, objects):
+    dataset = datasetFactory.get(dataType=dataType, name=f'{name}_{serializer}', serializer=serializer)
+    start = time.perf_counter()
+    with dataset.open('w') as datasetWriter:
+        for value in objects:
+            datasetWriter.append(value)
+    writeTime = time.perf_counter() - start
+    start = time.perf_counter()
+    count = sum(1 for _ in dataset.open('r'))
+    readTime = time.perf_counter() - start
+    size = sum(os.path.getsize(os.path.join(dataset.directory, fileName)) for fileName in os.listdir(dataset.directory))
+    if count != len(objects):
+        raise ValueError(f'{dataset.name}: {count} objects were read instead of {len(objects)}')
+    return writeTime, readTime, size
+
+
+def benchmark_serializers(location='/tmp/hypergol_benchmark', articleCount=2000, codec='gzip'):
+    """Compares the chunk serializers on the data models of the example project
+
+    Writes and reads the same ``Article`` and ``ArticlePage`` objects with each serializer and prints the times and the size of the datasets.
+
+    Parameters
+    ----------
+    location : str
+        Temporary data directory, deleted after the benchmark
+    articleCount : int
+        Number of objects to create of each type
+    codec : str
+        Codec of the datasets
+    """
+    datasetFactory = DatasetFactory(
+        location=location,
+        project='benchmark',
+        branch='benchmark',
+        chunkCount=16,
+        repoData=RepoData.get_dummy(),
+        codec=codec
+    )
+    testData = {
+        'Article': (Article, [create_article(articleId=k) for k in range(articleCount)]),
+        'ArticlePage': (ArticlePage, [create_article_page(articlePageId=k) for k in range(articleCount)]),
+    }
+    try:
+        for dataTypeName, (dataType, objects) in testData.items():
+            print(f'{dataTypeName} ({len(objects)} objects, codec: {codec})')
+            for serializer in SERIALIZERS:
+                writeTime, readTime, size = _time_dataset(
+                    datasetFactory=datasetFactory,
+                    dataType=dataType,
+                    name=dataTypeName.lower(),
+                    serializer=serializer,
+                    objects=objects
+                )
+                print(f'    {serializer:8} write: {writeTime:7.3f}s read: {readTime:7.3f}s size: {size / 1024 / 1024:8.2f}MB')
+    finally:
+        shutil.rmtree(location, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    fire.Fire(benchmark_serializers)
@@ -0,0 +1,168 @@
+import io
+import gzip
+
+from hypergol.repr import Repr
+
+
+class UnknownChunkCodecException(Exception):
+    pass
+
+
+class ChunkCodec(Repr):
+    """Base class of the compression methods the chunk files of a :class:`Dataset` can be stored with
+
+    Codecs open the files in binary mode, the :class:`DataChunk` is responsible to convert its content to bytes. The codec is recorded in the ``.def`` file so readers pick it up automatically.
+    """
+
+    name = None
+    extension = None
+
+    def __init__(self, level=None):
+        """
+        Parameters
+        ----------
+        level : int = None
+            Compression level, if None the codec's default is used
+        """
+        self.level = level
+
+    def __eq__(self, other):
+        return isinstance(other, ChunkCodec) and self.to_data() == other.to_data()
+
+    def open(self, fileName, mode):
+        """Opens a file for binary reading or writing
+
+        Parameters
+        ----------
+        fileName : str
+            Full path of the file
+        mode : str = ('w' or 'r')
+            The mode the file to be opened in
+        """
+        raise NotImplementedError(f'{self.__class__.__name__} must implement open()')
+
+    def compress(self, data):
+        """Compresses a block of bytes into a self-contained unit (gzip member, zstd/lz4 frame), that can be concatenated to a file and still read by :func:`open()`"""
+        raise NotImplementedError(f'{self.__class__.__name__} must implement compress()')
+
+    def decompress(self, data):
+        """Decompresses a single block created by :func:`compress()`"""
+        raise NotImplementedError(f'{self.__class__.__name__} must implement decompress()')
+
+    def to_data(self):
+        """Converts the codec into a dictionary so it can be stored in the ``.def`` file"""
+        return {'name': self.name, 'level': self.level}
+
+    @staticmethod
+    def from_data(data):
+        """Creates the codec from the data in the ``.def`` file, datasets created before codecs were introduced are gzip-ed at the default level
+
+        Parameters
+        ----------
+        data : dict
+            Result of a previous :func:`to_data()` call or None
+        """
+        if data is None:
+            return GzipCodec()
+        return get_codec(name=data['name'], level=data['level'])
+
+
+class GzipCodec(ChunkCodec):
+    """Stores chunks as ``.gz`` files (default, compatible with all previous datasets)"""
+
+    name = 'gzip'
+    extension = '.gz'
+
+    def __init__(self, level=9):
+        super(GzipCodec, self).__init__(level=level)
+
+    def open(self, fileName, mode):
+        return gzip.open(fileName, f'{mode}b', compresslevel=self.level)
+
+    def compress(self, data):
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def decompress(self, data):
+        return gzip.decompress(data)
+
+
+class ZstdCodec(ChunkCodec):
+    """Stores chunks as ``.zst`` files, requires the ``zstandard`` package"""
+
+    name = 'zstd'
+    extension = '.zst'
+
+    def __init__(self, level=3):
+        super(ZstdCodec, self).__init__(level=level)
+
+    def open(self, fileName, mode):
+        import zstandard    # pylint: disable=import-outside-toplevel
+        if mode == 'w':
+            return zstandard.ZstdCompressor(level=self.level).stream_writer(open(fileName, 'wb'), closefd=True)
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(fileName, 'rb'), read_across_frames=True, closefd=True))
+
+    def compress(self, data):
+        import zstandard    # pylint: disable=import-outside-toplevel
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def decompress(self, data):
+        import zstandard    # pylint: disable=import-outside-toplevel
+        return zstandard.ZstdDecompressor().decompress(data)
+
+
+class Lz4Codec(ChunkCodec):
+    """Stores chunks as ``.lz4`` files, requires the ``lz4`` package"""
+
+    name = 'lz4'
+    extension = '.lz4'
+
+    def __init__(self, level=0):
+        super(Lz4Codec, self).__init__(level=level)
+
+    def open(self, fileName, mode):
+        import lz4.frame    # pylint: disable=import-outside-toplevel
+        return lz4.frame.open(fileName, f'{mode}b', compression_level=self.level)
+
+    def compress(self, data):
+        import lz4.frame    # pylint: disable=import-outside-toplevel
+        return lz4.frame.compress(data, compression_level=self.level)
+
+    def decompress(self, data):
+        import lz4.frame    # pylint: disable=import-outside-toplevel
+        return lz4.frame.decompress(data)
+
+
+class NoCodec(ChunkCodec):
+    """Stores chunks uncompressed"""
+
+    name = 'none'
+    extension = ''
+
+    def open(self, fileName, mode):
+        return open(fileName, f'{mode}b')
+
+    def compress(self, data):
+        return bytes(data)
+
+    def decompress(self, data):
+        return data
+
+
+CODECS = {codec.name: codec for codec in [GzipCodec, ZstdCodec, Lz4Codec, NoCodec]}
+
+
+def get_codec(name, level=None):
+    """Creates a codec by name
+
+    Parameters
+    ----------
+    name : str = ('gzip', 'zstd', 'lz4', 'none')
+        Name of the codec
+    level : int = None
+        Compression level, if None the codec's default is used
+    """
+    if name not in CODECS:
+        raise UnknownChunkCodecException(f'Unknown codec: {name}, valid values are: {", ".join(CODECS.keys())}')
+    if level is None:
+        return CODECS[name]()
+    return CODECS[name](level=level)
@@ -0,0 +1,147 @@
+import json
+import struct
+
+from hypergol.repr import Repr
+
+RECORD_LENGTH_FORMAT = '<I'
+RECORD_LENGTH_SIZE = struct.calcsize(RECORD_LENGTH_FORMAT)
+
+
+class UnknownChunkSerializerException(Exception):
+    pass
+
+
+class ChunkSerializer(Repr):
+    """Base class of the record formats the objects of a :class:`Dataset` can be stored in
+
+    A serializer converts the output of ``to_data()`` into a single self-delimiting record (bytes) and back. The output must be deterministic because the :class:`DataChunk` checksums are calculated on it. The serializer is recorded in the ``.def`` file so readers pick it up automatically.
+    """
+
+    name = None
+    extension = None
+
+    def __eq__(self, other):
+        return isinstance(other, ChunkSerializer) and self.to_data() == other.to_data()
+
+    def dumps(self, data):
+        """Converts the dictionary form of an object into a record
+
+        Parameters
+        ----------
+        data : dict
+            Result of a ``to_data()`` call
+        """
+        raise NotImplementedError(f'{self.__class__.__name__} must implement dumps()')
+
+    def loads(self, record):
+        """Converts a record created by :func:`dumps()` back to the dictionary form"""
+        raise NotImplementedError(f'{self.__class__.__name__} must implement loads()')
+
+    def iter_records(self, file):
+        """Iterates through the records of an (uncompressed) binary file without decoding them
+
+        Parameters
+        ----------
+        file : file object
+            Binary file opened for reading
+        """
+        raise NotImplementedError(f'{self.__class__.__name__} must implement iter_records()')
+
+    def to_data(self):
+        """Converts the serializer into a dictionary so it can be stored in the ``.def`` file"""
+        return {'name': self.name}
+
+    @staticmethod
+    def from_data(data):
+        """Creates the serializer from the data in the ``.def`` file, datasets created before serializers were introduced are stored as JSON lines
+
+        Parameters
+        ----------
+        data : dict
+            Result of a previous :func:`to_data()` call or None
+        """
+        if data is None:
+            return JsonSerializer()
+        return get_serializer(name=data['name'])
+
+
+class JsonSerializer(ChunkSerializer):
+    """Stores each object as a line of JSON with sorted keys using the standard library (default, compatible with all previous datasets)"""
+
+    name = 'json'
+    extension = '.jsonl'
+
+    def dumps(self, data):
+        return f'{json.dumps(data, sort_keys=True)}\n'.encode('utf-8')
+
+    def loads(self, record):
+        return json.loads(record)
+
+    def iter_records(self, file):
+        return iter(file)
+
+
+class OrjsonSerializer(ChunkSerializer):
+    """Stores each object as a line of JSON with sorted keys using ``orjson``
+
+    The output is compact and not escaped to ASCII so it is not byte-identical to :class:`JsonSerializer`, integers must fit into 64 bits.
+    """
+
+    name = 'orjson'
+    extension = '.jsonl'
+
+    def dumps(self, data):
+        import orjson    # pylint: disable=import-outside-toplevel
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE)
+
+    def loads(self, record):
+        import orjson    # pylint: disable=import-outside-toplevel
+        return orjson.loads(record)
+
+    def iter_records(self, file):
+        return iter(file)
+
+
+def _sort_keys(data):
+    """Recursively orders dictionaries so the ``msgpack`` output does not depend on insertion order"""
+    if isinstance(data, dict):
+        return {k: _sort_keys(data[k]) for k in sorted(data.keys())}
+    if isinstance(data, (list, tuple)):
+        return [_sort_keys(v) for v in data]
+    return data
+
+
+class MsgpackSerializer(ChunkSerializer):
+    """Stores each object as a length-prefixed ``msgpack`` record with sorted keys"""
+
+    name = 'msgpack'
+    extension = '.msgpack'
+
+    def dumps(self, data):
+        import msgpack    # pylint: disable=import-outside-toplevel
+        payload = msgpack.packb(_sort_keys(data), use_bin_type=True)
+        return struct.pack(RECORD_LENGTH_FORMAT, len(payload)) + payload
+
+    def loads(self, record):
+        import msgpack    # pylint: disable=import-outside-toplevel
+        return msgpack.unpackb(memoryview(record)[RECORD_LENGTH_SIZE:], raw=False)
+
+    def iter_records(self, file):
+        for header in iter(lambda: file.read(RECORD_LENGTH_SIZE), b''):
+            yield header + file.read(struct.unpack(RECORD_LENGTH_FORMAT, header)[0])
+
+
+SERIALIZERS = {serializer.name: serializer for serializer in [JsonSerializer, OrjsonSerializer, MsgpackSerializer]}
+
+
+def get_serializer(name):
+    """Creates a serializer by name
+
+    Parameters
+    ----------
+    name : str = ('json', 'orjson', 'msgpack')
+        Name of the serializer
+    """
+    if name not in SERIALIZERS:
+        raise UnknownChunkSerializerException(f'Unknown serializer: {name}, valid values are: {", ".join(SERIALIZERS.keys())}')
+    return SERIALIZERS[name]()
@@ -0,0 +1,33 @@
+import fire
+
+from hypergol.cli.dataset_loader import load_dataset
+
+
+def compact_dataset(dataDirectory, project, branch, name, projectDirectory='.', threads=None):
+    """Merges the segments created by appending to a dataset into a single file for each chunk
+
+    Parameters
+    ----------
+    dataDirectory : string
+        location of the project data
+    project : string
+        project name of the dataset
+    branch : string
+        branch name of the dataset
+    name : string
+        name of the dataset
+    projectDirectory : string (default ``.``)
+        location of the project, the dataset's data model class is imported from ``data_models``
+    threads : int (default None)
+        number of processes to merge the chunks in
+
+
+    Please see :func:`~hypergol.dataset.Dataset.compact` in :class:`Dataset` for details.
+
+    """
+    dataset = load_dataset(dataDirectory=dataDirectory, project=project, branch=branch, name=name, projectDirectory=projectDirectory)
+    dataset.compact(threads=threads)
+
+
+if __name__ == "__main__":
+    fire.Fire(compact_dataset)
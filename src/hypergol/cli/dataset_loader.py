@@ -0,0 +1,39 @@
+import sys
+import json
+import importlib
+from pathlib import Path
+
+from hypergol.dataset import Dataset
+from hypergol.repo_data import RepoData
+from hypergol.name_string import NameString
+
+
+def load_dataset(dataDirectory, project, branch, name, projectDirectory='.'):
+    """Creates a :class:`Dataset` object for an existing dataset based on its ``.def`` file, the data model class is imported from the project's ``data_models`` directory and the repository data is taken from the ``.def`` file
+
+    Parameters
+    ----------
+    dataDirectory : string
+        location of the project data
+    project : string
+        project name of the dataset
+    branch : string
+        branch name of the dataset
+    name : string
+        name of the dataset
+    projectDirectory : string (default ``.``)
+        location of the project
+    """
+    defFileData = json.load(open(Path(dataDirectory, project, branch, name, f'{name}.def'), 'rt'))
+    if projectDirectory not in sys.path:
+        sys.path.insert(0, projectDirectory)
+    dataModelModule = importlib.import_module(f'data_models.{NameString(defFileData["dataType"]).asSnake}')
+    return Dataset(
+        dataType=getattr(dataModelModule, defFileData['dataType']),
+        location=dataDirectory,
+        project=project,
+        branch=branch,
+        name=name,
+        chunkCount=defFileData['chunkCount'],
+        repoData=RepoData.from_data(defFileData['repo'])
+    )
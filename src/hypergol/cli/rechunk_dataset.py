@@ -0,0 +1,56 @@
+import fire
+
+from hypergol.dataset import Dataset
+from hypergol.cli.dataset_loader import load_dataset
+
+
+def rechunk_dataset(dataDirectory, project, branch, name, chunkCount, outputName=None, outputBranch=None, codec=None, projectDirectory='.', threads=None):
+    """Copies a dataset into a new dataset with a different number of chunks
+
+    Parameters
+    ----------
+    dataDirectory : string
+        location of the project data
+    project : string
+        project name of the dataset
+    branch : string
+        branch name of the dataset
+    name : string
+        name of the dataset
+    chunkCount : int
+        number of chunks of the new dataset (16, 256 or 4096)
+    outputName : string (default ``<name>_<chunkCount>``)
+        name of the new dataset
+    outputBranch : string (default ``branch``)
+        branch of the new dataset
+    codec : string (default None)
+        compression of the new dataset, defaults to that of the original dataset
+    projectDirectory : string (default ``.``)
+        location of the project, the dataset's data model class is imported from ``data_models``
+    threads : int (default None)
+        number of processes to copy the chunks in
+
+
+    Please see :func:`~hypergol.dataset.Dataset.rechunk` in :class:`Dataset` for details.
+
+    """
+    dataset = load_dataset(dataDirectory=dataDirectory, project=project, branch=branch, name=name, projectDirectory=projectDirectory)
+    dataset.init(mode='r')
+    outputDataset = Dataset(
+        dataType=dataset.dataType,
+        location=dataDirectory,
+        project=project,
+        branch=outputBranch or branch,
+        name=outputName or f'{name}_{chunkCount}',
+        repoData=dataset.repoData,
+        chunkCount=chunkCount,
+        codec=codec or dataset.codec,
+        serializer=dataset.serializer,
+        indexed=dataset.indexed,
+        sortedByHash=dataset.sortedByHash
+    )
+    dataset.rechunk(outputDataset=outputDataset, threads=threads)
+
+
+if __name__ == "__main__":
+    fire.Fire(rechunk_dataset)
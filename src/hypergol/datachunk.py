@@ -1,8 +1,21 @@
-import gzip
-import json
+import os
+import time
+import heapq
+import queue
+import pickle
+import shutil
 import hashlib
+import threading
+from operator import itemgetter
 
 from hypergol.repr import Repr
+from hypergol.utils import get_hash
+from hypergol.datachunk_index import DataChunkIndex
+from hypergol.datachunk_index import INDEX_BLOCK_SIZE
+from hypergol.dataset_chk_file import CHECKSUM_BUFFER_SIZE
+
+PREFETCH_BATCH_SIZE = 64
+SORT_BUFFER_SIZE = 16*1024*1024
 
 
 class DatasetTypeDoesNotMatchDataTypeException(Exception):
@@ -16,11 +29,86 @@ class DataChunkChecksum(Repr):
         self.value = value
 
 
+class DataChunkPrefetcher:
+    """Reads and decodes the objects of a chunk on a background thread into a bounded queue, so decompression and I/O overlap with the processing of the previous objects
+
+    Objects are passed in batches of ``PREFETCH_BATCH_SIZE`` to reduce synchronisation, the time the consumer is blocked waiting for the next batch is accumulated in ``waitTime``.
+    """
+
+    def __init__(self, iterator, size):
+        """
+        Parameters
+        ----------
+        iterator : iterator
+            Iterator of the decoded objects, it is consumed on the background thread
+        size : int
+            Maximum number of objects to read ahead
+        """
+        self.iterator = iterator
+        self.batchSize = min(PREFETCH_BATCH_SIZE, size)
+        self.queue = queue.Queue(maxsize=max(1, size // self.batchSize))
+        self.stopEvent = threading.Event()
+        self.waitTime = 0.0
+        self.thread = threading.Thread(target=self._read, daemon=True)
+        self.thread.start()
+
+    def _put(self, message):
+        """Puts a message into the queue unless the prefetcher was stopped, returns False if it was"""
+        while not self.stopEvent.is_set():
+            try:
+                self.queue.put(message, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _read(self):
+        try:
+            batch = []
+            for value in self.iterator:
+                batch.append(value)
+                if len(batch) == self.batchSize:
+                    if not self._put(('data', batch)):
+                        return
+                    batch = []
+            if len(batch) > 0 and not self._put(('data', batch)):
+                return
+            self._put(('end', None))
+        except Exception as ex:  # pylint: disable=broad-except
+            self._put(('error', ex))
+
+    def __iter__(self):
+        while True:
+            start = time.perf_counter()
+            message, value = self.queue.get()
+            self.waitTime += time.perf_counter() - start
+            if message == 'error':
+                raise value
+            if message == 'end':
+                return
+            yield from value
+
+    def stop(self):
+        """Stops the background thread, must be called before the file is closed"""
+        self.stopEvent.set()
+        try:
+            while True:
+                self.queue.get_nowait()
+        except queue.Empty:
+            pass
+        self.thread.join()
+
+
 class DataChunk(Repr):
     """This class represents the file that the data is actually stored in
 
     When opened for writing it implements the :func:`append()` method and when reading the :func:`__iter__` iterator. Upon close, it returns the checksum (SHA1 hash) of the content that was written into it.
 
+    Data appended to an existing dataset is stored in a new segment file for each chunk (``name_chunkId.segment.jsonl.gz``), the first segment is the original chunk file. When reading, the segments are read one after the other.
+
+    If the dataset is indexed, the records are compressed in blocks and a :class:`DataChunkIndex` is saved next to the file upon close. If the dataset is sorted by hash, the records are kept in memory and written in the order of their hashed :term:`hash id` upon close. If the records in memory exceed ``SORT_BUFFER_SIZE`` bytes, they are sorted and written into a temporary run file next to the chunk, upon close the runs are merged, so at most ``SORT_BUFFER_SIZE`` bytes of records are kept in memory for each open chunk.
+
+    While writing, the number of records, the uncompressed size and the time spent writing are counted, see :func:`get_stats()`.
     """
 
     def __init__(self, dataset, chunkId, mode):
@@ -31,32 +119,121 @@ class DataChunk(Repr):
             The dataset this class chunk belongs to
         chunkId : str
             The hexadecimal identified of this chunk
-        mode : str = ('w' or 'r')
-            The mode this chunk was created to be opened in, determined by :func:`Dataset.get_data_chunks()`
+        mode : str = ('w', 'a' or 'r')
+            The mode this chunk was created to be opened in, determined by :func:`Dataset.get_data_chunks()`, in ``'a'`` mode a new segment is written
         """
         self.dataset = dataset
         self.chunkId = chunkId
         self.mode = mode
+        self.segment = dataset.segmentCount if mode == 'a' else 0
         self.file = None
         self.hasher = None
         self.checksum = None
+        self.index = None
+        self.block = None
+        self.sortBuffer = None
+        self.prefetcher = None
+        self.waitTime = 0.0
+        self.fields = None
+        self.where = None
+        self.recordRange = None
+        self.recordPosition = 0
+        self.recordCount = 0
+        self.rawBytes = 0
+        self.compressedBytes = 0
+        self.writeTime = 0.0
+
+    @property
+    def isSorted(self):
+        """True if the records of the chunk are in the order of their hashed :term:`hash id`"""
+        return self.dataset.sortedByHash and self.dataset.segmentCount == 1
 
     @property
     def fileName(self):
-        """Name of the file the data will be stored"""
-        return f'{self.dataset.name}_{self.chunkId}.jsonl.gz'
+        """Name of the file the data will be stored, the extension depends on the dataset's serializer and codec"""
+        return self.get_file_name(segment=self.segment)
+
+    @property
+    def indexFileName(self):
+        """Name of the index file of an indexed chunk"""
+        return self.get_index_file_name(segment=self.segment)
+
+    def get_file_name(self, segment):
+        """Name of the file of a segment of the chunk"""
+        if segment == 0:
+            return f'{self.dataset.name}_{self.chunkId}{self.dataset.fileExtension}'
+        return f'{self.dataset.name}_{self.chunkId}.{segment}{self.dataset.fileExtension}'
 
-    def open(self):
-        """Opens the chunk according to the mode specified at creation"""
+    def get_index_file_name(self, segment):
+        """Name of the index file of a segment of an indexed chunk"""
+        if segment == 0:
+            return f'{self.dataset.name}_{self.chunkId}.idx'
+        return f'{self.dataset.name}_{self.chunkId}.{segment}.idx'
+
+    def open(self, prefetch=0, fields=None, where=None, sort=True, recordRange=None):
+        """Opens the chunk according to the mode specified at creation
+
+        Parameters
+        ----------
+        prefetch : int = 0
+            Reading only: if not zero, up to this many objects are read ahead on a background thread by a :class:`DataChunkPrefetcher`
+        fields : List[str] = None
+            Reading only: if set, instead of the objects, dictionaries with only these members are returned (in their serialised form) and ``from_data()`` is not called
+        where : callable = None
+            Reading only: if set, only records for which ``where(data)`` is true are returned, ``data`` is the serialised form (the input of ``from_data()``) of the object
+        sort : bool = True
+            Writing only: if the dataset is sorted by hash, the records are sorted before they are written into the file, set it to False if they are written in order already
+        recordRange : Tuple[int, int] = None
+            Reading only: if set, only the records from the ``start`` position up to (not including) the ``end`` position are read (``end`` can be None), positions are counted across the segments before ``where`` is applied and the records before ``start`` are skipped without decoding them
+        """
         fileName = f'{self.dataset.directory}/{self.fileName}'
-        self.file = gzip.open(fileName, f'{self.mode}t')
+        if self.mode != 'r' and self.dataset.indexed:
+            self.file = open(fileName, 'wb')
+            self.index = DataChunkIndex()
+            self.block = bytearray()
+        else:
+            self.file = self.dataset.codec.open(fileName=fileName, mode='r' if self.mode == 'r' else 'w')
         self.hasher = hashlib.sha1((self.checksum or '').encode('utf-8'))
+        self.waitTime = 0.0
+        self.fields = fields
+        self.where = where
+        self.recordRange = recordRange
+        self.recordPosition = 0
+        if self.mode != 'r':
+            self.recordCount = 0
+            self.rawBytes = 0
+            self.writeTime = 0.0
+            if self.dataset.sortedByHash and sort:
+                self.sortBuffer = _SortBuffer(fileName=fileName)
+        if self.mode == 'r' and prefetch > 0:
+            self.prefetcher = DataChunkPrefetcher(iterator=self._read_objects(), size=prefetch)
         return self
 
     def close(self):
         """Closes the file handler and gets the checksum and returns it as ``DataChunkChecksum`` object"""
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
+            self.waitTime = self.prefetcher.waitTime
+            self.prefetcher = None
+        self.fields = None
+        self.where = None
+        self.recordRange = None
+        if self.sortBuffer is not None:
+            sortBuffer = self.sortBuffer
+            self.sortBuffer = None
+            for hashKey, data, recordCount in sortBuffer.get_records():
+                self.write(data=data, hashKey=hashKey, recordCount=recordCount)
+        start = time.perf_counter()
+        if self.index is not None:
+            self._write_block()
+            self.index.save(fileName=f'{self.dataset.directory}/{self.indexFileName}')
+            self.index = None
+            self.block = None
         self.file.close()
         self.file = None
+        if self.mode != 'r':
+            self.writeTime += time.perf_counter() - start
+            self.compressedBytes = os.path.getsize(f'{self.dataset.directory}/{self.fileName}')
         self.checksum = self.hasher.hexdigest()
         self.hasher = None
         return DataChunkChecksum(chunk=self, value=self.checksum)
@@ -73,14 +250,348 @@ class DataChunk(Repr):
             raise DatasetTypeDoesNotMatchDataTypeException(f"Trying to append an object of type {value.__class__.__name__} into a dataset of type {self.dataset.dataType.__name__}")
         if self.dataset.get_object_chunk_id(value.get_hash_id()) != self.chunkId:
             raise ValueError(f'Incorrect hashId {self.dataset.get_object_chunk_id(value)} was inserted into {self.dataset.name} chunk {self.chunkId}.')
-        self.write(data=f'{json.dumps(value.to_data(), sort_keys=True)}\n')
+        hashKey = get_hash(value.get_hash_id()) if self.index is not None or self.sortBuffer is not None else None
+        self.write(data=self.dataset.serializer.dumps(value.to_data()), hashKey=hashKey)
+
+    def write(self, data, hashKey=None, recordCount=1):
+        """Writes (uncompressed) bytes into the file and updates the hash, used in multithreaded rechunking in :class:`Task`
+
+        Parameters
+        ----------
+        data : bytes
+            Serialized records, if the dataset is indexed it must be exactly one record
+        hashKey : str = None
+            Hashed :term:`hash id` of the record, required only if the dataset is indexed or sorted by hash
+        recordCount : int = 1
+            Number of records in ``data`` for the statistics, use 0 when copying parts of a file and add the count separately
+        """
+        if self.sortBuffer is not None:
+            if hashKey is None:
+                raise ValueError(f'Writing into a chunk sorted by hash requires a hashKey in {self.dataset.name} chunk {self.chunkId}')
+            self.sortBuffer.append(hashKey=hashKey, data=bytes(data), recordCount=recordCount)
+            return
+        start = time.perf_counter()
+        self.hasher.update(data)
+        self.recordCount += recordCount
+        self.rawBytes += len(data)
+        if self.index is None:
+            self.file.write(data)
+        else:
+            if hashKey is None:
+                raise ValueError(f'Writing into an indexed chunk requires a hashKey in {self.dataset.name} chunk {self.chunkId}')
+            self.index.add_record(hashKey=hashKey, offset=len(self.block), length=len(data))
+            self.block.extend(data)
+            if len(self.block) >= INDEX_BLOCK_SIZE:
+                self._write_block()
+        self.writeTime += time.perf_counter() - start
+
+    def concatenate(self, fileNames, stats):
+        """Creates the chunk by copying the compressed content of other chunk files (with the same codec and serializer) one after the other, used in merging in :class:`Task`
+
+        All codecs can read a series of compressed units (gzip members, zstd/lz4 frames) as one file, so the files are not recompressed. The checksum is calculated by decompressing the files and the indices of indexed chunks are shifted to the new positions of the blocks. The chunk must not be opened.
+
+        Parameters
+        ----------
+        fileNames : List[str]
+            Full path of the chunk files to be copied in order
+        stats : List[dict]
+            Statistics of the files in the ``.stats`` file format (see :func:`get_stats()`)
+        """
+        start = time.perf_counter()
+        hasher = hashlib.sha1((self.checksum or '').encode('utf-8'))
+        buffer = memoryview(bytearray(CHECKSUM_BUFFER_SIZE))
+        index = DataChunkIndex() if self.dataset.indexed else None
+        with open(f'{self.dataset.directory}/{self.fileName}', 'wb') as file:
+            for fileName in fileNames:
+                if index is not None:
+                    fileIndex = DataChunkIndex.load(fileName=f'{fileName[:-len(self.dataset.fileExtension)]}.idx')
+                    blockCount = len(index.blocks)
+                    index.blocks.extend([offset + file.tell(), length] for offset, length in fileIndex.blocks)
+                    index.records.extend([hashKey, blockNumber + blockCount, offset, length] for hashKey, blockNumber, offset, length in fileIndex.records)
+                with open(fileName, 'rb') as inputFile:
+                    shutil.copyfileobj(inputFile, file)
+                with self.dataset.codec.open(fileName=fileName, mode='r') as inputFile:
+                    for n in iter(lambda: inputFile.readinto(buffer), 0):  # pylint: disable=cell-var-from-loop
+                        hasher.update(buffer[:n])
+        if index is not None:
+            index.save(fileName=f'{self.dataset.directory}/{self.indexFileName}')
+        self.checksum = hasher.hexdigest()
+        self.recordCount = sum(fileStats['recordCount'] for fileStats in stats)
+        self.rawBytes = sum(fileStats['rawBytes'] for fileStats in stats)
+        self.compressedBytes = os.path.getsize(f'{self.dataset.directory}/{self.fileName}')
+        self.writeTime = time.perf_counter() - start
+        return DataChunkChecksum(chunk=self, value=self.checksum)
+
+    def copy_blocks(self, blocks):
+        """Creates the chunk from blocks compressed by the dataset's codec (:func:`ChunkCodec.compress()`) without recompressing them, used in merging the output of :class:`ShuffleWriter` in :class:`Task`. The blocks are decompressed only to calculate the checksum. The chunk must not be opened.
+
+        Parameters
+        ----------
+        blocks : iterable
+            ``(compressedData, recordCount, records)`` tuples, ``records`` is the list of ``[hashKey, offset, length]`` of each record in the decompressed block, it is required only if the dataset is indexed
+        """
+        start = time.perf_counter()
+        hasher = hashlib.sha1((self.checksum or '').encode('utf-8'))
+        index = DataChunkIndex() if self.dataset.indexed else None
+        self.recordCount = 0
+        self.rawBytes = 0
+        with open(f'{self.dataset.directory}/{self.fileName}', 'wb') as file:
+            for compressedData, recordCount, records in blocks:
+                data = self.dataset.codec.decompress(compressedData)
+                hasher.update(data)
+                if index is not None:
+                    for hashKey, offset, length in records:
+                        index.add_record(hashKey=hashKey, offset=offset, length=length)
+                    index.add_block(offset=file.tell(), length=len(compressedData))
+                file.write(compressedData)
+                self.recordCount += recordCount
+                self.rawBytes += len(data)
+        if index is not None:
+            index.save(fileName=f'{self.dataset.directory}/{self.indexFileName}')
+        self.checksum = hasher.hexdigest()
+        self.compressedBytes = os.path.getsize(f'{self.dataset.directory}/{self.fileName}')
+        self.writeTime = time.perf_counter() - start
+        return DataChunkChecksum(chunk=self, value=self.checksum)
+
+    def _write_block(self):
+        """Compresses the current block of an indexed chunk and records its position"""
+        if len(self.block) == 0:
+            return
+        compressedBlock = self.dataset.codec.compress(self.block)
+        self.index.add_block(offset=self.file.tell(), length=len(compressedBlock))
+        self.file.write(compressedBlock)
+        self.block = bytearray()
+
+    def get_stats(self):
+        """Returns the statistics of the last write as a dictionary for the ``.stats`` file"""
+        return {
+            'recordCount': self.recordCount,
+            'rawBytes': self.rawBytes,
+            'compressedBytes': self.compressedBytes,
+            'writeTime': self.writeTime
+        }
 
-    def write(self, data):
-        """Writes into the file and updates the hash, used in multithreaded rechunking in :class:`Task`"""
-        self.hasher.update(data.encode('utf-8'))
-        self.file.write(data)
+    def load_index(self):
+        """Loads the :class:`DataChunkIndex` of each segment of an indexed chunk"""
+        return [
+            DataChunkIndex.load(fileName=f'{self.dataset.directory}/{self.get_index_file_name(segment=segment)}')
+            for segment in range(self.dataset.segmentCount)
+        ]
+
+    def get(self, hashKeys, indices=None):
+        """Reads the objects with the given hashed :term:`hash id`-s, with an index only the blocks containing them are decompressed, otherwise the chunk is scanned
+
+        Parameters
+        ----------
+        hashKeys : List[str]
+            Hashed hash ids (as returned by :func:`get_hash`) of the objects, all must belong to this chunk
+        indices : List[DataChunkIndex] = None
+            Index of each segment of the chunk as returned by :func:`load_index()`, if None the entire chunk is read
+
+        Returns a dictionary of hashKey and the list of objects with that key.
+        """
+        result = {}
+        if indices is None:
+            hashKeys = set(hashKeys)
+            self.open()
+            try:
+                for value in self:
+                    hashKey = get_hash(value.get_hash_id())
+                    if hashKey in hashKeys:
+                        result.setdefault(hashKey, []).append(value)
+            finally:
+                self.close()
+            return result
+        serializer = self.dataset.serializer
+        for segment, index in enumerate(indices):
+            blocks = {}
+            with open(f'{self.dataset.directory}/{self.get_file_name(segment=segment)}', 'rb') as file:
+                for hashKey in hashKeys:
+                    for blockOffset, blockLength, offset, length in index.get_locations(hashKey=hashKey):
+                        if blockOffset not in blocks:
+                            file.seek(blockOffset)
+                            blocks[blockOffset] = self.dataset.codec.decompress(file.read(blockLength))
+                        record = blocks[blockOffset][offset:offset + length]
+                        result.setdefault(hashKey, []).append(self.dataset.dataType.from_data(serializer.loads(record)))
+        return result
 
     def __iter__(self):
         """Iterator to read all the data from the file"""
-        for line in self.file:
-            yield self.dataset.dataType.from_data(json.loads(line.rstrip()))
+        if self.prefetcher is not None:
+            return iter(self.prefetcher)
+        return self._read_objects()
+
+    def _read_records(self):
+        """Iterates through the serialised records of all the segments that are in ``recordRange``, ``recordPosition`` counts the records read so far"""
+        if self.recordRange is None:
+            yield from self._read_segment_records()
+            return
+        start, end = self.recordRange
+        for record in self._read_segment_records():
+            if end is not None and self.recordPosition >= end:
+                return
+            self.recordPosition += 1
+            if self.recordPosition > start:
+                yield record
+
+    def _read_segment_records(self):
+        yield from self.dataset.serializer.iter_records(self.file)
+        for segment in range(1, self.dataset.segmentCount):
+            with self.dataset.codec.open(fileName=f'{self.dataset.directory}/{self.get_file_name(segment=segment)}', mode='r') as file:
+                yield from self.dataset.serializer.iter_records(file)
+
+    def read_records(self, withHashKeys=False):
+        """Reads the serialised records of all the segments without opening the chunk (e.g.: to copy them into another dataset without decoding)
+
+        Parameters
+        ----------
+        withHashKeys : bool = False
+            If the dataset is not indexed, the records must be decoded to get their hashed :term:`hash id`, this only happens if this is set
+
+        Yields ``(record, hashKey)`` tuples, hashKey is None if the dataset is not indexed and ``withHashKeys`` is False
+        """
+        serializer = self.dataset.serializer
+        for segment in range(self.dataset.segmentCount):
+            with self.dataset.codec.open(fileName=f'{self.dataset.directory}/{self.get_file_name(segment=segment)}', mode='r') as file:
+                if self.dataset.indexed:
+                    index = DataChunkIndex.load(fileName=f'{self.dataset.directory}/{self.get_index_file_name(segment=segment)}')
+                    for record, (hashKey, *_) in zip(serializer.iter_records(file), index.records):
+                        yield record, hashKey
+                elif withHashKeys:
+                    for record in serializer.iter_records(file):
+                        yield record, get_hash(self.dataset.dataType.from_data(serializer.loads(record)).get_hash_id())
+                else:
+                    for record in serializer.iter_records(file):
+                        yield record, None
+
+    def _read_objects(self):
+        serializer = self.dataset.serializer
+        if self.fields is None and self.where is None:
+            for record in self._read_records():
+                yield self.dataset.dataType.from_data(serializer.loads(record))
+            return
+        for record in self._read_records():
+            data = serializer.loads(record)
+            if self.where is not None and not self.where(data):
+                continue
+            if self.fields is None:
+                yield self.dataset.dataType.from_data(data)
+            else:
+                yield {field: data[field] for field in self.fields}
+
+
+class DataChunkGroup(Repr):
+    """Consecutive chunks of a dataset that together cover a single chunk of a dataset with fewer chunks, e.g.: ``a0``-``af`` of 256 chunks for ``a`` of 16 chunks (chunk ids are hash prefixes so they nest)
+
+    Implements the reading interface of :class:`DataChunk` so the chunks can be read as one: they are opened and closed one after the other while iterating.
+    """
+
+    def __init__(self, dataChunks, chunkId):
+        """
+        Parameters
+        ----------
+        dataChunks : List[DataChunk]
+            Chunks in the group in chunk id order, all of them opened in ``'r'`` mode
+        chunkId : str
+            The :term:`chunk id` the group covers, the prefix of the chunk ids of all the chunks
+        """
+        self.dataChunks = dataChunks
+        self.chunkId = chunkId
+        self.dataset = dataChunks[0].dataset
+        self.mode = 'r'
+        self.isSorted = all(dataChunk.isSorted for dataChunk in dataChunks)
+        self.iterator = None
+        self.prefetcher = None
+        self.waitTime = 0.0
+
+    def open(self, prefetch=0, fields=None, where=None, recordRange=None):
+        """Prepares the group for reading, the parameters are the same as of :func:`DataChunk.open()`, ``prefetch`` reads ahead and ``recordRange`` counts the positions across the chunks of the group"""
+        self.iterator = self._read_objects(fields=fields, where=where, recordRange=recordRange)
+        self.waitTime = 0.0
+        if prefetch > 0:
+            self.prefetcher = DataChunkPrefetcher(iterator=self.iterator, size=prefetch)
+        return self
+
+    def close(self):
+        """Stops reading and closes the chunk being read"""
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
+            self.waitTime = self.prefetcher.waitTime
+            self.prefetcher = None
+        self.iterator.close()
+        self.iterator = None
+
+    def __iter__(self):
+        """Iterator to read all the data from the chunks one after the other"""
+        if self.prefetcher is not None:
+            return iter(self.prefetcher)
+        return self.iterator
+
+    def _read_objects(self, fields, where, recordRange):
+        if recordRange is None:
+            for dataChunk in self.dataChunks:
+                dataChunk.open(fields=fields, where=where)
+                try:
+                    yield from dataChunk
+                finally:
+                    dataChunk.close()
+            return
+        start, end = recordRange
+        position = 0
+        for dataChunk in self.dataChunks:
+            if end is not None and position >= end:
+                return
+            dataChunk.open(fields=fields, where=where, recordRange=(max(0, start - position), None if end is None else end - position))
+            try:
+                yield from dataChunk
+                position += dataChunk.recordPosition
+            finally:
+                dataChunk.close()
+
+
+class _SortBuffer:
+    """Records written into a chunk sorted by hash, if they exceed ``SORT_BUFFER_SIZE`` bytes they are sorted and written into a temporary run file (``{fileName}.run000``, ...)"""
+
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.records = []
+        self.size = 0
+        self.runs = []
+
+    def append(self, hashKey, data, recordCount):
+        self.records.append((hashKey, data, recordCount))
+        self.size += len(data)
+        if self.size >= SORT_BUFFER_SIZE:
+            self._write_run()
+
+    def _write_run(self):
+        """Sorts the records in memory and writes them into the next run file"""
+        self.records.sort(key=itemgetter(0))
+        runFileName = f'{self.fileName}.run{len(self.runs):03}'
+        with open(runFileName, 'wb') as runFile:
+            for record in self.records:
+                pickle.dump(record, runFile, protocol=pickle.HIGHEST_PROTOCOL)
+        self.runs.append(runFileName)
+        self.records = []
+        self.size = 0
+
+    def get_records(self):
+        """Yields the ``(hashKey, data, recordCount)`` records merged from the runs and the memory in the order of the hash keys (records with the same key in the order they were appended), deletes the run files at the end"""
+        self.records.sort(key=itemgetter(0))
+        try:
+            yield from heapq.merge(*[_read_sort_run(fileName=runFileName) for runFileName in self.runs], self.records, key=itemgetter(0))
+        finally:
+            for runFileName in self.runs:
+                os.remove(runFileName)
+            self.runs = []
+            self.records = []
+
+
+def _read_sort_run(fileName):
+    """Yields the records of a run file written by :class:`_SortBuffer`"""
+    with open(fileName, 'rb') as runFile:
+        while True:
+            try:
+                yield pickle.load(runFile)
+            except EOFError:
+                return
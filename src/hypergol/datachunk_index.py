@@ -0,0 +1,53 @@
+import gzip
+import json
+
+from hypergol.repr import Repr
+
+INDEX_BLOCK_SIZE = 64*1024
+
+
+class DataChunkIndex(Repr):
+    """Sidecar file of an indexed :class:`DataChunk` that stores where each record can be found
+
+    Indexed chunks are written in blocks (a block is a separately compressed unit of roughly ``INDEX_BLOCK_SIZE`` bytes of records) so that any record can be read by decompressing only the block it is in. The index stores the position of the blocks and for each record (in the order they were written) its hashed :term:`hash id` and the position within its block.
+    """
+
+    def __init__(self, blocks=None, records=None):
+        """
+        Parameters
+        ----------
+        blocks : List[List[int]]
+            ``[offset, length]`` of each compressed block in the chunk file
+        records : List[List[str, int, int, int]]
+            ``[hashKey, blockNumber, offset, length]`` of each record, offset is relative to the start of the decompressed block
+        """
+        self.blocks = blocks or []
+        self.records = records or []
+        self._locations = None
+
+    def add_record(self, hashKey, offset, length):
+        """Adds a record to the block currently being written"""
+        self.records.append([hashKey, len(self.blocks), offset, length])
+
+    def add_block(self, offset, length):
+        """Closes the current block"""
+        self.blocks.append([offset, length])
+
+    def get_locations(self, hashKey):
+        """Returns the list of ``(blockOffset, blockLength, recordOffset, recordLength)`` of the records with the ``hashKey``"""
+        if self._locations is None:
+            self._locations = {}
+            for recordHashKey, blockNumber, offset, length in self.records:
+                self._locations.setdefault(recordHashKey, []).append((*self.blocks[blockNumber], offset, length))
+        return self._locations.get(hashKey, [])
+
+    def save(self, fileName):
+        """Saves the index into a gzip-ed JSON file"""
+        with gzip.open(fileName, 'wt', compresslevel=1) as indexFile:
+            indexFile.write(json.dumps({'blocks': self.blocks, 'records': self.records}))
+
+    @classmethod
+    def load(cls, fileName):
+        """Loads the index from the file created by :func:`save()`"""
+        with gzip.open(fileName, 'rt') as indexFile:
+            return cls(**json.loads(indexFile.read()))
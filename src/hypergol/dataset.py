@@ -1,15 +1,31 @@
 import os
 import glob
+import traceback
+from itertools import islice
 from pathlib import Path
+from multiprocessing import Pool
+from multiprocessing import Process
+from multiprocessing import Queue
 
 from hypergol.datachunk import DataChunk
+from hypergol.datachunk import DataChunkGroup
+from hypergol.chunk_codec import ChunkCodec
+from hypergol.chunk_codec import GzipCodec
+from hypergol.chunk_codec import get_codec
+from hypergol.chunk_serializer import ChunkSerializer
+from hypergol.chunk_serializer import JsonSerializer
+from hypergol.chunk_serializer import get_serializer
 from hypergol.repr import Repr
 from hypergol.utils import get_hash
 from hypergol.repo_data import RepoData
 from hypergol.dataset_chk_file import DataSetChkFile
 from hypergol.dataset_def_file import DataSetDefFile
+from hypergol.dataset_stats_file import DataSetStatsFile
 
 VALID_CHUNKS = {16: 1, 256: 2, 4096: 3}
+READER_BATCH_SIZE = 256
+READER_QUEUE_SIZE = 8
+HASH_POSITION_DIGITS = 13
 
 
 class DatasetDoesNotExistException(Exception):
@@ -20,15 +36,25 @@ class DatasetAlreadyExistsException(Exception):
     pass
 
 
+class DatasetReaderWorkerException(Exception):
+    pass
+
+
+class DatasetRecordCountMismatchException(Exception):
+    pass
+
+
 class Dataset(Repr):
     """
     Dataset class to store BaseData objects that is readable/writable in a parallel manner.
 
-    Files will be stored in: ``location/project/branch/name/name_???.jsonl.gz``
+    Files will be stored in: ``location/project/branch/name/name_???.jsonl.gz`` (the extension depends on the serializer and the codec)
+
+    Data can be added to an existing dataset by opening it in ``'a'`` mode, this creates a new segment file for each chunk instead of rewriting the existing ones. The segments are read transparently and can be merged with :func:`compact()`.
 
     """
 
-    def __init__(self, dataType, location, project, branch, name, repoData=None, chunkCount=16):
+    def __init__(self, dataType, location, project, branch, name, repoData=None, chunkCount=16, codec=None, serializer=None, indexed=False, sortedByHash=False):
         """
         Parameters
         ----------
@@ -46,6 +72,14 @@ class Dataset(Repr):
             stores the commit information at the creation of the dataset
         chunkCount : int = {16 ( default), 256, 4096}
             How many files the data will be stored in, sets the granularity of multithreaded processing
+        codec : ChunkCodec or str = None
+            Compression of the chunk files (``'gzip'``, ``'zstd'``, ``'lz4'``, ``'none'`` or a :class:`ChunkCodec` with a chosen level), defaults to gzip. When the dataset is read, the codec stored in the ``.def`` file is used.
+        serializer : ChunkSerializer or str = None
+            Record format of the objects (``'json'``, ``'orjson'``, ``'msgpack'`` or a :class:`ChunkSerializer`), defaults to JSON lines. When the dataset is read, the serializer stored in the ``.def`` file is used.
+        indexed : bool = False
+            If True, chunks are compressed in blocks and an index is saved for each chunk so single objects can be read with :func:`get()` without reading the entire chunk. When the dataset is read, the value stored in the ``.def`` file is used.
+        sortedByHash : bool = False
+            If True, the objects in each chunk are written in the order of their hashed :term:`hash id` (each chunk is sorted in memory when it is closed) so tasks can join it with other datasets without sorting it, see :class:`Task`. When the dataset is read, the value stored in the ``.def`` file is used.
         """
         self.dataType = dataType
         self.location = location
@@ -53,10 +87,21 @@ class Dataset(Repr):
         self.branch = branch
         self.name = name
         self.chunkCount = chunkCount
+        if isinstance(codec, str):
+            codec = get_codec(name=codec)
+        self.codec = codec or GzipCodec()
+        if isinstance(serializer, str):
+            serializer = get_serializer(name=serializer)
+        self.serializer = serializer or JsonSerializer()
+        self.indexed = indexed
+        self.sortedByHash = sortedByHash
+        self.segmentCount = 1
+        self.chunkIndices = None
 
         self.repoData = repoData or RepoData.get_dummy()
         self.chkFile = DataSetChkFile(dataset=self)
         self.defFile = DataSetDefFile(dataset=self)
+        self.statsFile = DataSetStatsFile(dataset=self)
 
     def add_dependency(self, dataset):
         """Adds the ``.def`` file of a dataset to the ``.def`` file of this dataset so data lineage can be retraced
@@ -68,6 +113,11 @@ class Dataset(Repr):
         """
         self.defFile.add_dependency(dataset)
 
+    @property
+    def fileExtension(self):
+        """Extension of the chunk files, e.g.: ``.jsonl.gz``"""
+        return f'{self.serializer.extension}{self.codec.extension}'
+
     @property
     def directory(self):
         """Full path of the directory this dataset will be in"""
@@ -78,42 +128,56 @@ class Dataset(Repr):
 
         Parameters
         ----------
-        mode : str = ('w', 'r')
+        mode : str = ('w', 'a', 'r')
             The mode the dataset is about to be opened
 
 
         Based on the mode if
 
         - mode=='w' : fails if the dataset already exists otherwise creates the ``.def`` file
-        - mode=='r' : fails if the dataset doesn't exist otherwise compares the data in the ``.def.`` file to the definition in the class.
+        - mode=='r' or 'a' : fails if the dataset doesn't exist otherwise compares the data in the ``.def.`` file to the definition in the class and loads the codec, serializer and number of segments the dataset was written with.
         - otherwise : fails due to unknown mode
         """
         if mode == 'w':
             if self.exists():
                 raise DatasetAlreadyExistsException(f"Dataset {self.directory} already exist, delete the dataset first with Dataset.delete()")
             self.defFile.make_def_file()
-        elif mode == 'r':
+        elif mode in ['r', 'a']:
             if not self.exists():
                 raise DatasetDoesNotExistException(f'Dataset {self.directory} does not exist')
             self.defFile.check_def_file()
+            defFileData = self.defFile.get_def_file_data()
+            self.codec = ChunkCodec.from_data(defFileData.get('codec'))
+            self.serializer = ChunkSerializer.from_data(defFileData.get('serializer'))
+            self.indexed = defFileData.get('indexed', False)
+            self.segmentCount = defFileData.get('segmentCount', 1)
+            self.sortedByHash = defFileData.get('sortedByHash', False)
         else:
             raise ValueError(f'Invalid mode: {mode} in {self.directory}')
 
-    def open(self, mode):
+    def open(self, mode, workers=None, ordered=True, fields=None, where=None):
         """Opens the dataset for reading or writing
 
         Parameters
         ----------
-        mode : str = ('w', 'r')
-            The mode the dataset is about to be opened
+        mode : str = ('w', 'a', 'r')
+            The mode the dataset is about to be opened, ``'a'`` adds a new segment to an existing dataset
+        workers : int = None
+            Reading only: number of processes to decode the chunks in, by default chunks are read in the calling process
+        ordered : bool = True
+            Reading only: if False, objects are returned in the order the workers finish decoding the chunks, otherwise in the chunk order
+        fields : List[str] = None
+            Reading only: if set, dictionaries of only these members are returned instead of the objects, see :class:`DatasetReader`
+        where : callable = None
+            Reading only: filter function called with the serialised form of each object before it is created, see :class:`DatasetReader`
 
 
         Returns a :class:`DatasetWriter` or :class:`DatasetReader` object that handles the reading or writing of the files through the dataset's chunks.
         """
-        if mode == 'w':
-            return DatasetWriter(dataset=self)
+        if mode in ['w', 'a']:
+            return DatasetWriter(dataset=self, mode=mode)
         if mode == 'r':
-            return DatasetReader(dataset=self)
+            return DatasetReader(dataset=self, workers=workers, ordered=ordered, fields=fields, where=where)
         raise ValueError(f'Invalid mode: {mode} in {self.name}')
 
     def get_chunk_ids(self):
@@ -128,6 +192,215 @@ class Dataset(Repr):
             for chunkId in self.get_chunk_ids()
         ]
 
+    def get_data_chunk_groups(self, chunkCount):
+        """Creates the chunks for reading grouped by the :term:`chunk id`-s of a dataset with ``chunkCount`` chunks, e.g.: with 256 chunks and ``chunkCount=16`` the chunks ``a0``-``af`` are read together as chunk ``a``
+
+        Parameters
+        ----------
+        chunkCount : int = {16, 256, 4096}
+            Number of groups, cannot be more than the dataset's own number of chunks
+
+        Returns a list of :class:`DataChunk` (if ``chunkCount`` is the same as the dataset's) or :class:`DataChunkGroup` objects
+        """
+        if chunkCount not in VALID_CHUNKS or chunkCount > self.chunkCount:
+            raise ValueError(f'{self.name} with {self.chunkCount} chunks cannot be read in {chunkCount} groups')
+        dataChunks = self.get_data_chunks(mode='r')
+        if chunkCount == self.chunkCount:
+            return dataChunks
+        groupSize = self.chunkCount // chunkCount
+        return [
+            DataChunkGroup(dataChunks=dataChunks[k:k + groupSize], chunkId=dataChunks[k].chunkId[:VALID_CHUNKS[chunkCount]])
+            for k in range(0, self.chunkCount, groupSize)
+        ]
+
+    def get(self, hashId):
+        """Returns the object with the :term:`hash id` (the first one if there are more) or None if it is not in the dataset
+
+        Parameters
+        ----------
+        hashId : tuple
+            Return value of the object's ``get_hash_id()``
+        """
+        values = self.get_many(hashIds=[hashId])
+        return values[0] if len(values) > 0 else None
+
+    def get_many(self, hashIds):
+        """Returns the objects with the :term:`hash id`-s in the order of ``hashIds``, ids that are not in the dataset are skipped
+
+        Only the chunks the objects belong to are read. If the dataset is indexed, the indices are loaded once and only the blocks containing the objects are decompressed.
+
+        Parameters
+        ----------
+        hashIds : List[tuple]
+            Return values of the objects' ``get_hash_id()``
+        """
+        if self.chunkIndices is None:
+            self.init(mode='r')
+            self.chunkIndices = {}
+        hashKeys = [get_hash(hashId) for hashId in hashIds]
+        chunkHashKeys = {}
+        for hashKey in hashKeys:
+            chunkHashKeys.setdefault(hashKey[:VALID_CHUNKS[self.chunkCount]], []).append(hashKey)
+        values = {}
+        for chunkId, keys in chunkHashKeys.items():
+            dataChunk = DataChunk(dataset=self, chunkId=chunkId, mode='r')
+            if self.indexed and chunkId not in self.chunkIndices:
+                self.chunkIndices[chunkId] = dataChunk.load_index()
+            values.update(dataChunk.get(hashKeys=sorted(set(keys)), indices=self.chunkIndices.get(chunkId)))
+        return [value for hashKey in hashKeys for value in values.get(hashKey, [])]
+
+    def sample(self, fraction, seed=0):
+        """Returns an iterator of a deterministic random sample of the objects
+
+        An object is selected if its hashed :term:`hash id` falls into the ``fraction`` long section of the hash space starting at a point determined by ``seed``. Because chunks are contiguous sections of the hash space, only the chunks overlapping the selected section are read (and if the dataset is indexed, only the blocks containing the selected objects). The same seed selects the same objects in any dataset (e.g.: the same data in a different branch) regardless of the number of chunks.
+
+        Parameters
+        ----------
+        fraction : float
+            Expected proportion of the objects in the sample, must be between 0 and 1
+        seed : str or int = 0
+            Different seeds select different (overlapping) samples
+        """
+        if not 0 < fraction <= 1:
+            raise ValueError(f'fraction must be between 0 and 1 in {self.name}.sample(): {fraction}')
+        start = _get_hash_position(get_hash(seed))
+        for k, dataChunk in enumerate(self.get_data_chunks(mode='r')):
+            chunkStart = k / self.chunkCount
+            if (chunkStart - start) % 1 >= fraction and (start - chunkStart) % 1 >= 1 / self.chunkCount:
+                continue
+            if self.indexed:
+                indices = dataChunk.load_index()
+                hashKeys = list(dict.fromkeys(
+                    hashKey for index in indices for hashKey, *_ in index.records
+                    if _is_in_sample(hashKey=hashKey, start=start, fraction=fraction)
+                ))
+                values = dataChunk.get(hashKeys=hashKeys, indices=indices)
+                for hashKey in hashKeys:
+                    yield from values[hashKey]
+                continue
+            try:
+                dataChunk.open()
+                for value in dataChunk:
+                    if _is_in_sample(hashKey=get_hash(value.get_hash_id()), start=start, fraction=fraction):
+                        yield value
+            finally:
+                dataChunk.close()
+
+    def head(self, n):
+        """Returns an iterator of the first ``n`` objects, only the chunks needed for them are read
+
+        Parameters
+        ----------
+        n : int
+            Number of objects to return
+        """
+        iterator = iter(self.open('r'))
+        try:
+            yield from islice(iterator, n)
+        finally:
+            iterator.close()
+
+    def compact(self, threads=None):
+        """Merges the segments of each chunk (created by appending to the dataset) into a single file in parallel
+
+        The chunks are written into a temporary dataset in ``location/temp/name_compact`` first and moved into place after all of them are finished.
+
+        Parameters
+        ----------
+        threads : int = None
+            Number of processes to merge the chunks in, defaults to the number of CPUs
+        """
+        self.init(mode='r')
+        if self.segmentCount == 1:
+            return
+        temporaryDataset = Dataset(
+            dataType=self.dataType,
+            location=self.location,
+            project='temp',
+            branch=f'{self.name}_compact',
+            name=self.name,
+            repoData=self.repoData,
+            chunkCount=self.chunkCount,
+            codec=self.codec,
+            serializer=self.serializer,
+            indexed=self.indexed,
+            sortedByHash=self.sortedByHash
+        )
+        dataChunks = self.get_data_chunks(mode='r')
+        jobs = list(zip(dataChunks, temporaryDataset.get_data_chunks(mode='w')))
+        pool = Pool(threads)
+        checksums = pool.map(_compact_function, jobs)
+        pool.close()
+        pool.join()
+        pool.terminate()
+        for dataChunk, checksum in zip(dataChunks, checksums):
+            for segment in range(1, self.segmentCount):
+                os.remove(Path(self.directory, dataChunk.get_file_name(segment=segment)))
+                if self.indexed:
+                    os.remove(Path(self.directory, dataChunk.get_index_file_name(segment=segment)))
+            os.replace(Path(temporaryDataset.directory, checksum.chunk.fileName), Path(self.directory, dataChunk.fileName))
+            if self.indexed:
+                os.replace(Path(temporaryDataset.directory, checksum.chunk.indexFileName), Path(self.directory, dataChunk.indexFileName))
+        self.segmentCount = 1
+        self.defFile.update_def_file(segmentCount=1)
+        self.chkFile.make_chk_file(checksums=checksums)
+        self.statsFile.make_stats_file(checksums=checksums)
+        temporaryDataset.delete()
+        os.rmdir(Path(self.location, 'temp', f'{self.name}_compact'))
+
+    def rechunk(self, outputDataset, threads=None):
+        """Copies the dataset into a new dataset with a different number of chunks in parallel
+
+        Because chunks are hash prefixes, each chunk of the dataset with fewer chunks corresponds to a group of chunks of the other one (e.g.: ``a`` of 16 is ``a0``-``af`` of 256), so each source chunk is read only once. Records are copied without decoding unless they must be routed into several chunks or sorted by hash and the dataset is not indexed. The output has this dataset as a dependency and the number of records is verified against the source.
+
+        Parameters
+        ----------
+        outputDataset : Dataset
+            Dataset with the same data type and serializer and the new chunk count (the codec can be different), must not exist
+        threads : int = None
+            Number of processes to copy the chunks in, defaults to the number of CPUs
+        """
+        self.init(mode='r')
+        if outputDataset.dataType != self.dataType or outputDataset.serializer != self.serializer:
+            raise ValueError(f'{outputDataset.name} must have the same data type and serializer as {self.name}')
+        sourceChunks = self.get_data_chunks(mode='r')
+        outputDataset.add_dependency(dataset=self)
+        targetChunks = outputDataset.get_data_chunks(mode='w')
+        jobs = []
+        if outputDataset.chunkCount >= self.chunkCount:
+            for sourceChunk in sourceChunks:
+                jobs.append(([sourceChunk], [targetChunk for targetChunk in targetChunks if targetChunk.chunkId.startswith(sourceChunk.chunkId)]))
+        else:
+            for targetChunk in targetChunks:
+                jobs.append(([sourceChunk for sourceChunk in sourceChunks if sourceChunk.chunkId.startswith(targetChunk.chunkId)], [targetChunk]))
+        pool = Pool(threads)
+        checksums = [checksum for jobChecksums in pool.map(_rechunk_function, jobs) for checksum in jobChecksums]
+        pool.close()
+        pool.join()
+        pool.terminate()
+        outputDataset.chkFile.make_chk_file(checksums=checksums)
+        outputDataset.statsFile.make_stats_file(checksums=checksums)
+        recordCount = len(self)
+        outputRecordCount = len(outputDataset)
+        if outputRecordCount != recordCount:
+            raise DatasetRecordCountMismatchException(f'Rechunking {self.name} into {outputDataset.name} resulted in {outputRecordCount} objects instead of {recordCount}')
+        return outputDataset
+
+    def stats(self):
+        """Returns the statistics of the dataset: the number of records, the uncompressed and compressed size in bytes and the time spent writing, both in total and for each chunk (in ``chunks`` by :term:`chunk id`)
+
+        These are saved into the ``.stats`` file when the dataset is written, for datasets without one the chunks are read to calculate them.
+        """
+        if not self.exists():
+            raise DatasetDoesNotExistException(f'Dataset {self.directory} does not exist')
+        if self.statsFile.exists():
+            return self.statsFile.get_stats_file_data()
+        return self.statsFile.calculate_stats()
+
+    def __len__(self):
+        """Number of objects in the dataset, read from the ``.stats`` file"""
+        return self.stats()['recordCount']
+
     def get_object_chunk_id(self, objectHashId):
         """Finds out which chunk the object belongs based on the :term:`hash id` """
         return get_hash(objectHashId)[:VALID_CHUNKS[self.chunkCount]]
@@ -149,10 +422,37 @@ class DatasetReader(Repr):
     """Class to read from a dataset
 
     Implements context manager and iterator. It doesn't open any file until any reading actually happens and then opens each chunk one by one.
+
+    With ``workers`` set, the chunks are decoded in separate processes that send the objects back in batches through bounded queues, so memory use doesn't depend on the size of the dataset. In ordered mode each worker reads every ``workers``-th chunk, so the objects can be returned in the same order as with a single process. In unordered mode the workers take the next unread chunk when they are finished with one. The worker processes cannot be started from the daemonic processes of a :class:`Pipeline`, use this in notebooks and scripts.
+
+    ``where`` and ``fields`` are applied on the dictionary returned by the serializer, so records that are filtered out or only partially needed never go through ``from_data()`` (which for nested data models is often the most expensive step). ``fields`` returns the requested members as they are stored, e.g.: nested data models remain dictionaries and dates remain strings. With ``workers`` set, ``where`` must be pickle-able (e.g.: a module level function).
+
+    Example::
+
+        with articlePages.open('r', fields=['articlePageId', 'url'], where=lambda data: data['url'].startswith('https')) as datasetReader:
+            urls = {value['articlePageId']: value['url'] for value in datasetReader}
     """
 
-    def __init__(self, dataset):
+    def __init__(self, dataset, workers=None, ordered=True, fields=None, where=None):
+        """
+        Parameters
+        ----------
+        dataset : Dataset
+            Dataset to be read
+        workers : int = None
+            Number of processes to decode the chunks in, if None or 1 the chunks are read in the calling process
+        ordered : bool = True
+            If False, objects are returned as soon as any worker decoded them
+        fields : List[str] = None
+            If set, dictionaries of only these members are returned instead of the objects
+        where : callable = None
+            If set, only objects for which ``where(data)`` is true are returned, ``data`` is the serialised form of the object (the input of ``from_data()``)
+        """
         self.dataset = dataset
+        self.workers = workers
+        self.ordered = ordered
+        self.fields = fields
+        self.where = where
         self.dataChunks = self.dataset.get_data_chunks(mode='r')
 
     def __enter__(self):
@@ -162,19 +462,135 @@ class DatasetReader(Repr):
         pass
 
     def __iter__(self):
+        if self.workers is not None and self.workers > 1:
+            yield from self._iterate_in_parallel()
+            return
         for chunk in self.dataChunks:
             try:
-                chunk.open()
+                chunk.open(fields=self.fields, where=self.where)
                 for elem in chunk:
                     yield elem
             finally:
                 chunk.close()
 
+    def _iterate_in_parallel(self):
+        """Starts the worker processes and collects the batches of objects from them"""
+        workers = min(self.workers, len(self.dataChunks))
+        inputQueues, outputQueues = self._get_queues(workers=workers)
+        processes = [
+            Process(target=_dataset_reader_worker, args=(self.dataChunks, self.fields, self.where, inputQueue, outputQueue), daemon=True)
+            for inputQueue, outputQueue in zip(inputQueues, outputQueues)
+        ]
+        for process in processes:
+            process.start()
+        try:
+            yield from self._collect_batches(workers=workers, outputQueues=outputQueues)
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+
+    def _get_queues(self, workers):
+        """Creates the queues of the chunk indices and the objects of each worker, in ordered mode each worker has its own queues and gets every ``workers``-th chunk, otherwise the workers share one pair of queues"""
+        if self.ordered:
+            inputQueues = [Queue() for _ in range(workers)]
+            outputQueues = [Queue(maxsize=READER_QUEUE_SIZE) for _ in range(workers)]
+            for k in range(len(self.dataChunks)):
+                inputQueues[k % workers].put(k)
+        else:
+            inputQueues = [Queue()] * workers
+            outputQueues = [Queue(maxsize=READER_QUEUE_SIZE * workers)] * workers
+            for k in range(len(self.dataChunks)):
+                inputQueues[0].put(k)
+        for inputQueue in inputQueues:
+            inputQueue.put(None)
+        return inputQueues, outputQueues
+
+    def _collect_batches(self, workers, outputQueues):
+        """Yields the objects from the workers, in ordered mode chunk by chunk in the order of the chunks, otherwise until all workers are done"""
+        if self.ordered:
+            for k in range(len(self.dataChunks)):
+                yield from _get_batches(outputQueue=outputQueues[k % workers], endMessage='end')
+        else:
+            for _ in range(workers):
+                yield from _get_batches(outputQueue=outputQueues[0], endMessage='done')
+
+
+def _get_hash_position(hashKey):
+    """Maps a hashed :term:`hash id` to [0, 1) so that the chunk with index ``k`` contains the positions in ``[k/chunkCount, (k+1)/chunkCount)``"""
+    return int(hashKey[:HASH_POSITION_DIGITS], 16) / 16**HASH_POSITION_DIGITS
+
+
+def _is_in_sample(hashKey, start, fraction):
+    """True if the position of ``hashKey`` is in the ``fraction`` long section of [0, 1) starting at ``start`` (wrapping around at 1)"""
+    return (_get_hash_position(hashKey) - start) % 1 < fraction
+
+
+def _compact_function(chunks):
+    """Copies the records of all segments of a chunk into a single file without decoding them, must be a module level function to run in a :class:`multiprocessing.Pool`"""
+    dataChunk, targetChunk = chunks
+    targetChunk.open()
+    for record, hashKey in dataChunk.read_records(withHashKeys=targetChunk.dataset.sortedByHash):
+        targetChunk.write(record, hashKey=hashKey)
+    return targetChunk.close()
+
+
+def _rechunk_function(chunks):
+    """Copies the records of the source chunks into the target chunks they belong to, returns the list of checksums of the target chunks"""
+    sourceChunks, targetChunks = chunks
+    targetChunks = {targetChunk.chunkId: targetChunk.open() for targetChunk in targetChunks}
+    targetDataset = next(iter(targetChunks.values())).dataset
+    withHashKeys = len(targetChunks) > 1 or targetDataset.indexed or targetDataset.sortedByHash
+    for sourceChunk in sourceChunks:
+        for record, hashKey in sourceChunk.read_records(withHashKeys=withHashKeys):
+            if len(targetChunks) == 1:
+                targetChunk = next(iter(targetChunks.values()))
+            else:
+                targetChunk = targetChunks[hashKey[:VALID_CHUNKS[targetDataset.chunkCount]]]
+            targetChunk.write(record, hashKey=hashKey)
+    return [targetChunk.close() for targetChunk in targetChunks.values()]
+
+
+def _get_batches(outputQueue, endMessage):
+    """Yields the objects from a worker's queue until the worker signals ``endMessage``"""
+    while True:
+        message, value = outputQueue.get()
+        if message == 'data':
+            yield from value
+        elif message == 'error':
+            raise DatasetReaderWorkerException(value)
+        elif message == endMessage:
+            return
+
+
+def _dataset_reader_worker(dataChunks, fields, where, inputQueue, outputQueue):
+    """Reads the chunks whose index arrives in ``inputQueue`` and sends the objects in batches, ``end`` after each chunk and ``done`` after the last one"""
+    try:
+        for k in iter(inputQueue.get, None):
+            chunk = dataChunks[k]
+            batch = []
+            try:
+                chunk.open(fields=fields, where=where)
+                for elem in chunk:
+                    batch.append(elem)
+                    if len(batch) == READER_BATCH_SIZE:
+                        outputQueue.put(('data', batch))
+                        batch = []
+            finally:
+                chunk.close()
+            if len(batch) > 0:
+                outputQueue.put(('data', batch))
+            outputQueue.put(('end', k))
+        outputQueue.put(('done', None))
+    except Exception:  # pylint: disable=broad-except
+        outputQueue.put(('error', traceback.format_exc()))
+
 
 class DatasetWriter(Repr):
     """Class to write into a dataset"""
 
-    def __init__(self, dataset):
+    def __init__(self, dataset, mode='w'):
         """Opens all chunks at once and puts them in a dictionary for easy lookup
 
         Implements context manager for proper file open/close.
@@ -183,9 +599,12 @@ class DatasetWriter(Repr):
         ----------
         dataset : Dataset
             Dataset to be written into, at this point it is already established that it doesn't yet exist.
+        mode : str = ('w', 'a')
+            In ``'a'`` mode the dataset must exist and the objects are written into a new segment of each chunk
         """
         self.dataset = dataset
-        self.dataChunks = {dataChunk.chunkId: dataChunk.open() for dataChunk in self.dataset.get_data_chunks(mode='w')}
+        self.mode = mode
+        self.dataChunks = {dataChunk.chunkId: dataChunk.open() for dataChunk in self.dataset.get_data_chunks(mode=mode)}
 
     def append(self, elem):
         """Writes a single object into the right chunks"""
@@ -193,12 +612,20 @@ class DatasetWriter(Repr):
         self.dataChunks[chunkHash].append(elem)
 
     def close(self):
-        """Closes the files and writes the ``.chk`` file"""
+        """Closes the files and writes the ``.chk`` and ``.stats`` files, in ``'a'`` mode these and the ``.def`` file are updated with the new segment"""
         checksums = []
         for chunk in self.dataChunks.values():
             checksum = chunk.close()
             checksums.append(checksum)
+        if self.mode == 'a':
+            self.dataset.statsFile.make_stats_file(checksums=checksums, update=True)
+            self.dataset.segmentCount += 1
+            self.dataset.defFile.update_def_file(segmentCount=self.dataset.segmentCount)
+            self.dataset.chkFile.make_chk_file(checksums=checksums, update=True)
+            self.dataset.chunkIndices = None
+            return
         self.dataset.chkFile.make_chk_file(checksums=checksums)
+        self.dataset.statsFile.make_stats_file(checksums=checksums)
 
     def __enter__(self):
         return self
@@ -1,8 +1,9 @@
+import os
 import json
-import gzip
 import hashlib
 
 from hypergol.utils import get_hash
+from hypergol.chunk_codec import ChunkCodec
 
 
 CHECKSUM_BUFFER_SIZE = 128*1024
@@ -22,18 +23,44 @@ class DataSetChkFile:
         """Full path of the checksum file for this dataset"""
         return f'{self.dataset.directory}/{self.dataset.name}.chk'
 
+    def exists(self):
+        """True if the dataset's ``.chk`` file exists, it is created after all the chunks of the dataset are written"""
+        return os.path.exists(self.chkFilename)
+
     def get_checksum(self):
         """Hashes the content of the be stored in the dependent dataset's ``.def`` file"""
         return get_hash(data=open(self.chkFilename, 'rt').read())
 
-    def make_chk_file(self, checksums):
+    def get_content_checksum(self):
+        """Hashes the checksums of the chunk files only, so it is the same for datasets with the same content (e.g.: in different branches) regardless of their ``.def`` files"""
+        chkData = json.loads(open(self.chkFilename, 'rt').read())
+        return get_hash(json.dumps({fileName: checksum for fileName, checksum in chkData.items() if not fileName.endswith('.def')}, sort_keys=True))
+
+    def make_chk_file(self, checksums, update=False):
         """Creates the ``.chk`` file
         Parameters
         ----------
         checksums : List[str]
             SHA1 hash of the content of each chunk file
+        update : bool = False
+            If True, the checksums are added to the existing file (after appending to the dataset) and the checksum of the ``.def`` file is updated
+        """
+        chkData = json.loads(open(self.chkFilename, 'rt').read()) if update else {}
+        chkData.update({checksum.chunk.fileName: checksum.value for checksum in checksums})
+        chkData[f'{self.dataset.name}.def'] = get_hash(open(self.dataset.defFile.defFilename, 'rt').read())
+        chkDataString = json.dumps(chkData, sort_keys=True, indent=4)
+        with open(self.chkFilename, 'wt') as chkFile:
+            chkFile.write(chkDataString)
+
+    def copy_chk_file(self, dataset):
+        """Creates the ``.chk`` file from the one of another dataset with the same name and the same chunk files (e.g.: linked from another branch), only the checksum of the ``.def`` file is recalculated
+
+        Parameters
+        ----------
+        dataset : Dataset
+            The dataset the chunk files are from
         """
-        chkData = {checksum.chunk.fileName: checksum.value for checksum in checksums}
+        chkData = json.loads(open(dataset.chkFile.chkFilename, 'rt').read())
         chkData[f'{self.dataset.name}.def'] = get_hash(open(self.dataset.defFile.defFilename, 'rt').read())
         chkDataString = json.dumps(chkData, sort_keys=True, indent=4)
         with open(self.chkFilename, 'wt') as chkFile:
@@ -43,6 +70,7 @@ class DataSetChkFile:
         """Verifies a dataset file's checksum file by loading the entire contents and recalculating the SHA1 values. Can take a long time so never called automatically.
         """
         chkFileData = json.loads(open(self.chkFilename, 'rt').read())
+        codec = ChunkCodec.from_data(self.dataset.defFile.get_def_file_data().get('codec'))
         mv = memoryview(bytearray(CHECKSUM_BUFFER_SIZE))
         for fileName, chkFileChecksum in chkFileData.items():
             if fileName.endswith('.def'):
@@ -50,7 +78,7 @@ class DataSetChkFile:
                 actualChecksum = get_hash(data)
             else:
                 hasher = hashlib.sha1(''.encode('utf-8'))
-                with gzip.open(f'{self.dataset.directory}/{fileName}', 'rb') as f:
+                with codec.open(fileName=f'{self.dataset.directory}/{fileName}', mode='r') as f:
                     for n in iter(lambda: f.readinto(mv), 0):   # pylint: disable=cell-var-from-loop
                         hasher.update(mv[:n])
                 actualChecksum = hasher.hexdigest()
@@ -38,6 +38,11 @@ class DataSetDefFile:
             'branch': self.dataset.branch,
             'name': self.dataset.name,
             'chunkCount': self.dataset.chunkCount,
+            'codec': self.dataset.codec.to_data(),
+            'serializer': self.dataset.serializer.to_data(),
+            'indexed': self.dataset.indexed,
+            'segmentCount': self.dataset.segmentCount,
+            'sortedByHash': self.dataset.sortedByHash,
             'creationTime': datetime.now().isoformat(),
             'dependencies': dependencyData,
             'repo': self.dataset.repoData.to_data()
@@ -46,6 +51,13 @@ class DataSetDefFile:
         with open(self.defFilename, 'wt') as defFile:
             defFile.write(json.dumps(defData, sort_keys=True, indent=4))
 
+    def update_def_file(self, **values):
+        """Updates values in an existing ``.def`` file (e.g.: the number of segments after appending to the dataset)"""
+        defData = self.get_def_file_data()
+        defData.update(values)
+        with open(self.defFilename, 'wt') as defFile:
+            defFile.write(json.dumps(defData, sort_keys=True, indent=4))
+
     def check_def_file(self):
         """Checks if a dataset already exists the definition of the object matches to that on disk"""
         defFileData = self.get_def_file_data()
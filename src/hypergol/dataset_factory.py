@@ -8,7 +8,7 @@ class DatasetFactory(Repr):
     """Convenience class to create lots of datasets at once. Used in pipelines where multiple datasets are created into the same location, project, branch
     """
 
-    def __init__(self, location, project, branch, chunkCount, repoData=None):
+    def __init__(self, location, project, branch, chunkCount, repoData=None, codec=None, serializer=None, indexed=False, sortedByHash=False):
         """
         Parameters
         ----------
@@ -22,12 +22,24 @@ class DatasetFactory(Repr):
             stores the commit information at the creation of the dataset
         chunkCount : int = {16 , 256, 4096}
             How many files the data will be stored in, sets the granularity of multithreaded processing
+        codec : ChunkCodec or str = None
+            Compression of the chunk files of the datasets, see :class:`Dataset`
+        serializer : ChunkSerializer or str = None
+            Record format of the objects of the datasets, see :class:`Dataset`
+        indexed : bool = False
+            If True, the datasets are created with a per chunk index, see :class:`Dataset`
+        sortedByHash : bool = False
+            If True, the objects in each chunk of the datasets are ordered by their hashed :term:`hash id`, see :class:`Dataset`
         """
         self.location = location
         self.project = project
         self.branch = branch
         self.chunkCount = chunkCount
         self.repoData = repoData or RepoData.get_dummy()
+        self.codec = codec
+        self.serializer = serializer
+        self.indexed = indexed
+        self.sortedByHash = sortedByHash
 
     @property
     def projectDirectory(self):
@@ -37,7 +49,7 @@ class DatasetFactory(Repr):
     def branchDirectory(self):
         return Path(self.location, self.project, self.branch)
 
-    def get(self, dataType, name, branch=None, chunkCount=None):
+    def get(self, dataType, name, branch=None, chunkCount=None, codec=None, serializer=None, indexed=None, sortedByHash=None):
         """Creates a dataset with the parameters given and the factory's own parameters
 
         Parameters
@@ -50,9 +62,25 @@ class DatasetFactory(Repr):
             Name of the dataset (recommended to be in snakecase)
         chunkCount : int=None
             Number of chunks, if None, the factory's own value will be used
+        codec : ChunkCodec or str = None
+            Compression of the chunk files, if None, the factory's own value will be used
+        serializer : ChunkSerializer or str = None
+            Record format of the objects, if None, the factory's own value will be used
+        indexed : bool = None
+            If True, the dataset is created with a per chunk index, if None, the factory's own value will be used
+        sortedByHash : bool = None
+            If True, the objects in each chunk are ordered by their hashed hash id, if None, the factory's own value will be used
         """
         if chunkCount is None:
             chunkCount = self.chunkCount
+        if codec is None:
+            codec = self.codec
+        if serializer is None:
+            serializer = self.serializer
+        if indexed is None:
+            indexed = self.indexed
+        if sortedByHash is None:
+            sortedByHash = self.sortedByHash
         if branch is None:
             branch = self.branch
         return Dataset(
@@ -62,5 +90,9 @@ class DatasetFactory(Repr):
             branch=branch,
             name=name,
             chunkCount=chunkCount,
-            repoData=self.repoData
+            repoData=self.repoData,
+            codec=codec,
+            serializer=serializer,
+            indexed=indexed,
+            sortedByHash=sortedByHash
         )
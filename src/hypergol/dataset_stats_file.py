@@ -0,0 +1,92 @@
+import os
+import json
+
+from hypergol.chunk_codec import ChunkCodec
+from hypergol.chunk_serializer import ChunkSerializer
+
+
+class DataSetStatsFile:
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+
+    @property
+    def statsFilename(self):
+        """Full path of the statistics file for this dataset"""
+        return f'{self.dataset.directory}/{self.dataset.name}.stats'
+
+    def exists(self):
+        """True if the dataset's ``.stats`` file exists (datasets created with earlier versions don't have one)"""
+        return os.path.exists(self.statsFilename)
+
+    def make_stats_file(self, checksums, update=False):
+        """Creates the ``.stats`` file from the statistics the chunks collected while they were written
+
+        Parameters
+        ----------
+        checksums : List[DataChunkChecksum]
+            Return values of :func:`DataChunk.close()` for each chunk
+        update : bool = False
+            If True, the statistics are added to the ones in the existing file (after appending to the dataset)
+        """
+        chunkStats = {checksum.chunk.chunkId: checksum.chunk.get_stats() for checksum in checksums}
+        if update:
+            previousChunkStats = self.get_stats_file_data()['chunks'] if self.exists() else self.calculate_stats()['chunks']
+            chunkStats = {
+                chunkId: _add_chunk_stats(previousChunkStats[chunkId], chunkStats[chunkId]) if chunkId in previousChunkStats else stats
+                for chunkId, stats in chunkStats.items()
+            }
+        statsData = _summarise(chunkStats=chunkStats)
+        with open(self.statsFilename, 'wt') as statsFile:
+            statsFile.write(json.dumps(statsData, sort_keys=True, indent=4))
+
+    def get_stats_file_data(self):
+        """Loads the data from the ``.stats`` file"""
+        return json.loads(open(self.statsFilename, 'rt').read())
+
+    def calculate_stats(self):
+        """Calculates the statistics of a dataset that has no ``.stats`` file by decompressing every chunk and counting the records. Write times are not available this way and are set to None.
+        """
+        defFileData = self.dataset.defFile.get_def_file_data()
+        codec = ChunkCodec.from_data(defFileData.get('codec'))
+        serializer = ChunkSerializer.from_data(defFileData.get('serializer'))
+        chunkStats = {}
+        segmentCount = defFileData.get('segmentCount', 1)
+        for chunk in self.dataset.get_data_chunks(mode='r'):
+            recordCount = 0
+            rawBytes = 0
+            compressedBytes = 0
+            for segment in range(segmentCount):
+                fileName = f'{self.dataset.directory}/{chunk.get_file_name(segment=segment)}'
+                with codec.open(fileName=fileName, mode='r') as file:
+                    for record in serializer.iter_records(file):
+                        recordCount += 1
+                        rawBytes += len(record)
+                compressedBytes += os.path.getsize(fileName)
+            chunkStats[chunk.chunkId] = {
+                'recordCount': recordCount,
+                'rawBytes': rawBytes,
+                'compressedBytes': compressedBytes,
+                'writeTime': None
+            }
+        return _summarise(chunkStats=chunkStats)
+
+
+def _add_chunk_stats(stats1, stats2):
+    """Adds up the statistics of two segments of the same chunk"""
+    return {
+        key: None if stats1[key] is None or stats2[key] is None else stats1[key] + stats2[key]
+        for key in ['recordCount', 'rawBytes', 'compressedBytes', 'writeTime']
+    }
+
+
+def _summarise(chunkStats):
+    """Adds the dataset level totals to the per chunk statistics"""
+    writeTimes = [stats['writeTime'] for stats in chunkStats.values()]
+    return {
+        'recordCount': sum(stats['recordCount'] for stats in chunkStats.values()),
+        'rawBytes': sum(stats['rawBytes'] for stats in chunkStats.values()),
+        'compressedBytes': sum(stats['compressedBytes'] for stats in chunkStats.values()),
+        'writeTime': None if None in writeTimes else sum(writeTimes),
+        'chunks': chunkStats
+    }
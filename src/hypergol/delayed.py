@@ -1,3 +1,11 @@
+import os
+import pickle
+from multiprocessing.util import Finalize
+
+_cache = {}
+_cacheProcessId = None
+
+
 class Delayed:
     """Enables delayed creation of classes so they can be declared in the main script and passed to a thread pickled."""
 
@@ -13,6 +21,17 @@ class Delayed:
         self.classType = classType
         self.args = args
         self.kwargs = kwargs
+        self.isCached = False
+
+    @classmethod
+    def cached(cls, classType, *args, **kwargs):
+        """Same as the constructor but the object is created only once in each process and reused by every :func:`make()` with the same class and parameters (e.g.: every job a worker executes). Use it for expensive objects (e.g.: a spacy model or a database connection pool).
+
+        The objects are released at the end of the process (when the pool is closed) or by calling :func:`clear_cache()`, their ``close()`` function is called if they have one.
+        """
+        delayed = cls(classType, *args, **kwargs)
+        delayed.isCached = True
+        return delayed
 
     @staticmethod
     def _make(v):
@@ -24,7 +43,29 @@ class Delayed:
     def make(self):
         """In a :func:`Task.initialise()`, each :class:`Delayed`'d classes :func:`make()` function is called that creates the class here:
         """
+        if not self.isCached:
+            return self._create()
+        global _cacheProcessId  # pylint: disable=global-statement
+        if _cacheProcessId != os.getpid():
+            # objects inherited from the parent process (e.g.: after fork) must not be shared
+            _cache.clear()
+            _cacheProcessId = os.getpid()
+            Finalize(None, Delayed.clear_cache, exitpriority=0)
+        key = pickle.dumps((self.classType, self.args, self.kwargs))
+        if key not in _cache:
+            _cache[key] = self._create()
+        return _cache[key]
+
+    def _create(self):
         return self.classType(
             *[self._make(arg) for arg in self.args],
             **{k: self._make(v) for k, v in self.kwargs.items()}
         )
+
+    @staticmethod
+    def clear_cache():
+        """Releases the objects created by :func:`cached()` :class:`Delayed`-s in this process, called automatically when the process exits"""
+        for value in _cache.values():
+            if callable(getattr(value, 'close', None)):
+                value.close()
+        _cache.clear()
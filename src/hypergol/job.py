@@ -1,5 +1,6 @@
 from typing import List
 from typing import Dict
+from typing import Tuple
 
 from hypergol.repr import Repr
 from hypergol.datachunk import DataChunk
@@ -8,7 +9,7 @@ from hypergol.datachunk import DataChunk
 class Job(Repr):
     """Class for passing information on chunks to tasks"""
 
-    def __init__(self, id_, total, parameters: Dict = None, inputChunks: List[DataChunk] = None, loadedInputChunks: List[DataChunk] = None):
+    def __init__(self, id_, total, parameters: Dict = None, inputChunks: List[DataChunk] = None, loadedInputChunks: List[DataChunk] = None, recordRange: Tuple[int, int] = None, recordCount: int = None):
         """
         Parameters
         ----------
@@ -19,12 +20,18 @@ class Job(Repr):
         parameters: object
             any information to be passed to the source_iterator()
         inputChunks: List[DataChunk]
-            these chunks will be iterated over while run() function is called
+            these chunks (or :class:`DataChunkGroup` if the datasets have different number of chunks) will be iterated over while run() function is called
         loadedInputChunks: List[DataChunk]
-            these chunks will be fully loaded before any run() function called
+            these chunks (or :class:`DataChunkGroup`) will be fully loaded before any run() function called
+        recordRange: Tuple[int, int]
+            if set, only this range of records of the input chunks are processed by this job, see ``recordRange`` in :func:`DataChunk.open()`
+        recordCount: int
+            estimated number of input records of the job (from the input dataset's ``.stats`` file), larger jobs are started first
         """
         self.id = id_
         self.total = total
         self.parameters = parameters or {}
         self.inputChunks = inputChunks or []
         self.loadedInputChunks = loadedInputChunks or []
+        self.recordRange = recordRange
+        self.recordCount = recordCount
@@ -5,7 +5,7 @@ class JobReport(Repr):
     """Class for passing information from the tasks to the pipeline
     """
 
-    def __init__(self, jobId, exceptions, results=None):
+    def __init__(self, jobId, exceptions, results=None, statistics=None):
         """
 
         Parameters
@@ -17,7 +17,10 @@ class JobReport(Repr):
             Was there any exception during execute()
         results: dict
             Any information to be passed to the finish() function
+        statistics: dict
+            Measurements of the execution (e.g.: ``inputWaitTime``, the seconds ``run()`` was waiting for its input)
         """
         self.jobId = jobId
         self.exceptions = exceptions
         self.results = results or {}
+        self.statistics = statistics or {}
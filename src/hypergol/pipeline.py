@@ -1,5 +1,7 @@
+import pickle
+import threading
 from typing import List
-from multiprocessing import Pool
+import multiprocessing
 
 from hypergol.logger import Logger
 from hypergol.task import Task
@@ -8,7 +10,7 @@ from hypergol.task import Task
 class Pipeline:
     """A simple pipeline that enables multithreaded execution of tasks"""
 
-    def __init__(self, tasks: List[Task], logger: Logger = None):
+    def __init__(self, tasks: List[Task], logger: Logger = None, startMethod: str = None, preload: List[str] = None):
         """
         Parameters
         ----------
@@ -17,44 +19,251 @@ class Pipeline:
 
         logger: Logger
             logger class
+
+        startMethod: str = None
+            How the worker processes are started (``fork``, ``forkserver`` or ``spawn``, see :mod:`multiprocessing`), if None, the platform's default is used
+
+        preload: List[str] = None
+            Modules to import in the forkserver process before any worker is started (only with ``startMethod='forkserver'``), so heavy imports happen once and not in every worker
         """
         self.exceptions = {}
         self.tasks = tasks
         self.logger = logger or Logger()
+        self.startMethod = startMethod
+        self.preload = preload or []
 
     def log(self, message):
         self.logger.log(f'{self.__class__.__name__} - {message}')
 
-    def run(self, threads=1, onlyTasks=None):
+    def run(self, threads=1, onlyTasks=None, resume=False, cache=False, streaming=False):
         """Runs each task
         Opens a set of threads, creates the list of job and calls the task's ``execute()`` function. Upon finishing it calls ``finalise`` to create the ``.chk`` file of the output dataset.
 
+        A task depends on the earlier tasks in the list that create any of its input datasets. Each task is started as soon as the tasks it depends on are finalised, so independent tasks run at the same time and share the worker processes. If a task fails, the tasks depending on it are skipped, the others are finished and then the exception is raised.
+
+        The worker processes are started once and used for the jobs and the merging of every task, so imports and any per-process state survive between tasks. Tasks with their own ``threads`` value get a separate set of processes of that size (also shared among tasks with the same value).
+
+        The jobs with the most input records are started first and the processes take the next job as soon as they are finished with the previous one.
+
+        The tasks are passed to each worker process once when it starts, after that only the :class:`Job`-s are sent. Each worker keeps the pickled task and each job is executed by a new copy unpickled from it, so changes a job makes to the members of the task are not seen by the other jobs.
+
         Parameters
         ----------
         threads : int = 1
             Number of threads to run
         onlyTasks : list = None
             list of task numbers in the task list to run (for debugging purpose). Add --onlyTasks=0 or --onlyTasks=1,2 parameter to the shell script in the CLI
+        resume : bool = False
+            Continues a pipeline that stopped (e.g.: a process crashed): finished tasks are skipped and only the jobs that did not finish without exceptions are executed (from their last checkpoint if the task has ``checkpointEvery`` set) before the merge. The tasks and their inputs must be the same as in the previous run.
+        cache : bool = False
+            Tasks are not executed if an output created by the same code, parameters and inputs exists (in any branch of the project, see :func:`Task.load_cached_output()`). Outputs in the current branch that were created differently are deleted and created again, so after changing a task only that task and the ones depending on its output are executed.
+        streaming : bool = False
+            Tasks don't wait for the tasks they depend on to finish: each job is started as soon as the input chunks it reads are merged (the merge of the other chunks and other jobs may be still running), only ``finalise()`` waits for the inputs to finish. Jobs are not split and not ordered by size, because the ``.stats`` files of the inputs don't exist yet. Not used with ``cache`` as the fingerprint of a task requires finished inputs.
         """
         self.log('START')
+        tasksToRun = self._get_tasks_to_run(onlyTasks=onlyTasks, resume=resume, cache=cache)
+        dependencies = _get_dependencies(tasks=tasksToRun)
+        pools = {}
+        condition = threading.Condition()
+        progresses = [_TaskProgress(condition=condition) for _ in tasksToRun]
+        errors = []
+        try:
+            for task in tasksToRun:
+                self._get_pool(pools=pools, threads=task.threads or threads, tasks=tasksToRun)
+            taskThreads = [
+                threading.Thread(target=self._run_task, kwargs={
+                    'taskKey': taskKey,
+                    'task': task,
+                    'pool': pools[task.threads or threads],
+                    'threads': task.threads or threads,
+                    'resume': resume,
+                    'cache': cache,
+                    'streaming': streaming and not cache,
+                    'upstreams': [(tasksToRun[upstreamKey].outputDataset, progresses[upstreamKey]) for upstreamKey in dependencies[taskKey]],
+                    'progress': progresses[taskKey],
+                    'errors': errors
+                })
+                for taskKey, task in enumerate(tasksToRun)
+            ]
+            for taskThread in taskThreads:
+                taskThread.start()
+            for taskThread in taskThreads:
+                taskThread.join()
+        finally:
+            for pool in pools.values():
+                pool.close()
+                pool.join()
+                pool.terminate()
+        for taskName, exceptions in self.exceptions.items():
+            self.log(f'{taskName}: exceptions: {exceptions}')
+        if len(errors) > 0:
+            raise errors[0]
+        self.log('END')
+
+    def _get_tasks_to_run(self, onlyTasks, resume, cache):
+        """Selects the tasks in ``onlyTasks``, skips the finished ones if resumed and checks that the outputs don't exist otherwise (with ``cache`` each task checks its own output when it starts)"""
         if onlyTasks is not None:
             if isinstance(onlyTasks, int):
                 onlyTasks = [onlyTasks]
             tasksToRun = [self.tasks[k] for k in onlyTasks]
         else:
             tasksToRun = self.tasks
-        for task in tasksToRun:
-            task.check_if_output_exists()
         for task in tasksToRun:
             if not isinstance(task, Task):
                 raise ValueError('Task must be of type Task')
-            pool = Pool(task.threads or threads)
-            jobReports = pool.map(task.execute, task.get_jobs())
+        if resume and not cache:
+            for task in tasksToRun:
+                if task.is_finished():
+                    self.log(f'{task.__class__.__name__} - finished in a previous run, skipping')
+            tasksToRun = [task for task in tasksToRun if not task.is_finished()]
+        elif not resume and not cache:
+            for task in tasksToRun:
+                task.check_if_output_exists()
+        return tasksToRun
+
+    def _run_task(self, taskKey, task, pool, threads, resume, cache, streaming, upstreams, progress, errors):
+        """Runs a task on its own thread after the tasks it depends on are finished (or in streaming mode started merging), the jobs and the merge are executed in the shared pool"""
+        try:
+            if streaming:
+                self._run_task_streaming(taskKey=taskKey, task=task, pool=pool, threads=threads, resume=resume, upstreams=upstreams, progress=progress)
+                return
+            if not _wait_for(upstreams=upstreams, predicate=lambda upstreamProgress: upstreamProgress.isFinished):
+                self.log(f'{task.__class__.__name__} - a task it depends on failed, skipping')
+                progress.finish(isFailed=True)
+                return
+            if cache:
+                if task.load_cached_output():
+                    self.log(f'{task.__class__.__name__} - output {task.outputDataset.name} is reused, skipping')
+                    return
+                if not resume:
+                    task.check_if_output_exists()
+            jobs = task.get_jobs()
+            finishedJobReports = task.get_finished_job_reports(jobs=jobs) if resume else {}
+            if len(finishedJobReports) > 0:
+                self.log(f'{task.__class__.__name__} - {len(finishedJobReports)} jobs finished in a previous run')
+            jobs = [job for job in jobs if job.id not in finishedJobReports]
+            jobSizes = [len(pickle.dumps(job)) for job in jobs]
+            self.log(f'{task.__class__.__name__} - {len(jobs)} jobs - job pickle size: {max(jobSizes, default=0)} bytes max, {sum(jobSizes)} bytes total')
+            jobsBySize = sorted(jobs, key=lambda job: job.recordCount or 0, reverse=True)
+            jobReports = list(pool.imap_unordered(_execute_job, [(taskKey, job) for job in jobsBySize]))
+            jobReports = sorted(jobReports + list(finishedJobReports.values()), key=lambda jobReport: jobReport.jobId)
             self.exceptions[task.__class__.__name__] = any(jobReport.exceptions for jobReport in jobReports)
-            task.finalise(jobReports=jobReports, threads=task.threads or threads)
-            pool.close()
-            pool.join()
-            pool.terminate()
-        for taskName, exceptions in self.exceptions.items():
-            self.log(f'{taskName}: exceptions: {exceptions}')
-        self.log('END')
+            task.finalise(jobReports=jobReports, threads=threads, pool=pool, onChunkMerged=progress.add_chunk)
+        except Exception as ex:  # pylint: disable=broad-except
+            self.log(f'{task.__class__.__name__} - failed: {ex}')
+            progress.finish(isFailed=True)
+            errors.append(ex)
+        finally:
+            progress.finish(isFailed=False)
+
+    def _run_task_streaming(self, taskKey, task, pool, threads, resume, upstreams, progress):
+        """Starts each job of the task as soon as all the input chunks it reads are merged, then finalises the task after the tasks it depends on are finished"""
+        if not _wait_for(upstreams=upstreams, predicate=lambda upstreamProgress: upstreamProgress.isFinished or len(upstreamProgress.chunkIds) > 0):
+            self.log(f'{task.__class__.__name__} - a task it depends on failed, skipping')
+            progress.finish(isFailed=True)
+            return
+        jobs = task.get_jobs()
+        finishedJobReports = task.get_finished_job_reports(jobs=jobs) if resume else {}
+        pendingJobs = [job for job in jobs if job.id not in finishedJobReports]
+        self.log(f'{task.__class__.__name__} - {len(pendingJobs)} jobs - streaming')
+        results = []
+        while len(pendingJobs) > 0:
+            with progress.condition:
+                if any(upstreamProgress.isFailed for _, upstreamProgress in upstreams):
+                    self.log(f'{task.__class__.__name__} - a task it depends on failed, skipping')
+                    progress.finish(isFailed=True)
+                    return
+                readyJobs = [job for job in pendingJobs if _is_job_ready(job=job, upstreams=upstreams)]
+                if len(readyJobs) == 0:
+                    progress.condition.wait()
+                    continue
+            for job in readyJobs:
+                results.append(pool.apply_async(_execute_job, ((taskKey, job), )))
+            readyJobIds = {job.id for job in readyJobs}
+            pendingJobs = [job for job in pendingJobs if job.id not in readyJobIds]
+        jobReports = sorted([result.get() for result in results] + list(finishedJobReports.values()), key=lambda jobReport: jobReport.jobId)
+        self.exceptions[task.__class__.__name__] = any(jobReport.exceptions for jobReport in jobReports)
+        if not _wait_for(upstreams=upstreams, predicate=lambda upstreamProgress: upstreamProgress.isFinished):
+            self.log(f'{task.__class__.__name__} - a task it depends on failed, skipping')
+            progress.finish(isFailed=True)
+            return
+        task.finalise(jobReports=jobReports, threads=threads, pool=pool, onChunkMerged=progress.add_chunk)
+
+    def _get_pool(self, pools, threads, tasks):
+        """Returns the pool with the given number of processes from ``pools``, creates it at first use and passes the tasks to each of its processes"""
+        if threads not in pools:
+            context = multiprocessing.get_context(self.startMethod)
+            if self.startMethod == 'forkserver' and len(self.preload) > 0:
+                context.set_forkserver_preload(self.preload)
+            pools[threads] = context.Pool(threads, initializer=_initialise_worker, initargs=(tasks, ))
+        return pools[threads]
+
+
+class _TaskProgress:
+    """State of a task running in :func:`Pipeline.run()` shared between the threads of the tasks, changes are notified through the pipeline wide ``condition``"""
+
+    def __init__(self, condition):
+        self.condition = condition
+        self.chunkIds = set()
+        self.isFinished = False
+        self.isFailed = False
+
+    def add_chunk(self, chunkId):
+        """Called when an output chunk of the task is merged"""
+        with self.condition:
+            self.chunkIds.add(chunkId)
+            self.condition.notify_all()
+
+    def finish(self, isFailed):
+        """Called when the task is finished, the first call decides if it failed"""
+        with self.condition:
+            if not self.isFinished:
+                self.isFinished = True
+                self.isFailed = isFailed
+            self.condition.notify_all()
+
+
+def _wait_for(upstreams, predicate):
+    """Waits until the predicate is true for all the upstream tasks, returns False if any of them failed"""
+    for _, upstreamProgress in upstreams:
+        with upstreamProgress.condition:
+            upstreamProgress.condition.wait_for(lambda: predicate(upstreamProgress) or upstreamProgress.isFailed)  # pylint: disable=cell-var-from-loop
+    return not any(upstreamProgress.isFailed for _, upstreamProgress in upstreams)
+
+
+def _is_job_ready(job, upstreams):
+    """True if all the input chunks of a job that are created by upstream tasks are merged, jobs without input chunks (e.g.: of source tasks) are always ready"""
+    inputChunks = job.inputChunks + job.loadedInputChunks
+    if len(inputChunks) == 0 or len(upstreams) == 0:
+        return True
+    chunkId = inputChunks[0].chunkId
+    for dataset, upstreamProgress in upstreams:
+        if upstreamProgress.isFinished:
+            continue
+        if not all(datasetChunkId in upstreamProgress.chunkIds for datasetChunkId in dataset.get_chunk_ids() if datasetChunkId.startswith(chunkId)):
+            return False
+    return True
+
+
+def _get_dependencies(tasks):
+    """Returns the positions of the earlier tasks each task depends on, i.e.: the ones whose output dataset is an input of the task"""
+    outputDirectories = [task.outputDataset.directory for task in tasks]
+    dependencies = []
+    for position, task in enumerate(tasks):
+        inputDirectories = {dataset.directory for dataset in task.inputDatasets + task.loadedInputDatasets}
+        dependencies.append([k for k in range(position) if outputDirectories[k] in inputDirectories])
+    return dependencies
+
+
+_workerTasks = []
+
+
+def _initialise_worker(tasks):
+    """Stores the pickled tasks of the pipeline in the worker process, runs once when the process starts"""
+    _workerTasks[:] = [pickle.dumps(task) for task in tasks]
+
+
+def _execute_job(taskJob):
+    """Executes a job with a new copy of the task stored in the worker process by :func:`_initialise_worker`, so the task is not sent for each job but each job starts from the original task"""
+    taskKey, job = taskJob
+    return pickle.loads(_workerTasks[taskKey]).execute(job)
@@ -0,0 +1,118 @@
+import os
+import json
+from pathlib import Path
+from itertools import groupby
+from operator import itemgetter
+
+from hypergol.repr import Repr
+from hypergol.utils import get_hash
+from hypergol.dataset import VALID_CHUNKS
+from hypergol.datachunk import DatasetTypeDoesNotMatchDataTypeException
+from hypergol.datachunk_index import INDEX_BLOCK_SIZE
+
+SHUFFLE_MANIFEST_FILENAME = 'manifest.json'
+
+
+class ShuffleWriter(Repr):
+    """Writes the output of a job in :class:`Task` into a few sorted run files instead of a temporary dataset with a file for each chunk
+
+    Records are buffered in memory and when the buffer is full they are ordered by :term:`chunk id` (keeping the order they were appended in, or ordered by hashed :term:`hash id` if the dataset is sorted by hash) and written into a run file. Each chunk's records are compressed in blocks of about ``INDEX_BLOCK_SIZE`` bytes with the dataset's codec and the position of the blocks is stored in a manifest. The merge step copies the blocks of each chunk into the output without recompressing them, the content of the chunks (and so their checksums) are identical to writing through a temporary dataset.
+
+    The directory contains the run files (``run_000.shf``, ...) and ``manifest.json``.
+    """
+
+    def __init__(self, dataset, directory, bufferSize):
+        """
+        Parameters
+        ----------
+        dataset : Dataset
+            The output dataset, determines the chunks, the serializer and the codec
+        directory : Path
+            Directory of the run files, must not exist
+        bufferSize : int
+            Size of the records in bytes kept in memory before they are written into a run file
+        """
+        self.dataset = dataset
+        self.directory = directory
+        self.bufferSize = bufferSize
+        self.buffer = []
+        self.bufferBytes = 0
+        self.runs = []
+        self.chunks = {}
+        os.makedirs(self.directory)
+
+    def append(self, elem):
+        """Adds a single object to the buffer and writes a run file if it is full"""
+        if not isinstance(elem, self.dataset.dataType):
+            raise DatasetTypeDoesNotMatchDataTypeException(f"Trying to append an object of type {elem.__class__.__name__} into a dataset of type {self.dataset.dataType.__name__}")
+        hashKey = get_hash(elem.get_hash_id())
+        record = self.dataset.serializer.dumps(elem.to_data())
+        chunkId = hashKey[:VALID_CHUNKS[self.dataset.chunkCount]]
+        self.buffer.append((chunkId, hashKey if self.dataset.sortedByHash else '', hashKey, record))
+        self.bufferBytes += len(record)
+        if self.bufferBytes >= self.bufferSize:
+            self._write_run()
+
+    def _write_run(self):
+        """Sorts the buffer and writes it into the next run file"""
+        if len(self.buffer) == 0:
+            return
+        runNumber = len(self.runs)
+        self.runs.append(f'run_{runNumber:03}.shf')
+        self.buffer.sort(key=itemgetter(0, 1))
+        withRecords = self.dataset.indexed or self.dataset.sortedByHash
+        with open(Path(self.directory, self.runs[-1]), 'wb') as runFile:
+            for chunkId, values in groupby(self.buffer, key=itemgetter(0)):
+                block = bytearray()
+                records = []
+                for _, _, hashKey, record in values:
+                    records.append([hashKey, len(block), len(record)])
+                    block.extend(record)
+                    if len(block) >= INDEX_BLOCK_SIZE:
+                        self._write_block(runFile=runFile, runNumber=runNumber, chunkId=chunkId, block=block, records=records, withRecords=withRecords)
+                        block = bytearray()
+                        records = []
+                if len(block) > 0:
+                    self._write_block(runFile=runFile, runNumber=runNumber, chunkId=chunkId, block=block, records=records, withRecords=withRecords)
+        self.buffer = []
+        self.bufferBytes = 0
+
+    def _write_block(self, runFile, runNumber, chunkId, block, records, withRecords):
+        compressedBlock = self.dataset.codec.compress(block)
+        self.chunks.setdefault(chunkId, []).append([runNumber, runFile.tell(), len(compressedBlock), len(records), records if withRecords else None])
+        runFile.write(compressedBlock)
+
+    def close(self):
+        """Writes the remaining records and the manifest"""
+        self._write_run()
+        with open(Path(self.directory, SHUFFLE_MANIFEST_FILENAME), 'wt') as manifestFile:
+            manifestFile.write(json.dumps({'runs': self.runs, 'chunks': self.chunks}))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @staticmethod
+    def load_blocks(directory, chunkIds):
+        """Loads the manifest from a directory written by a ShuffleWriter
+
+        Parameters
+        ----------
+        directory : Path
+            Directory of the run files
+        chunkIds : List[str]
+            Chunk ids of the output dataset
+
+        Returns a dictionary of chunk ids and the list of ``(runFileName, offset, length, recordCount, records)`` of the blocks of that chunk in the order they must be copied.
+        """
+        with open(Path(directory, SHUFFLE_MANIFEST_FILENAME), 'rt') as manifestFile:
+            manifest = json.load(manifestFile)
+        return {
+            chunkId: [
+                (str(Path(directory, manifest['runs'][runNumber])), offset, length, recordCount, records)
+                for runNumber, offset, length, recordCount, records in manifest['chunks'].get(chunkId, [])
+            ]
+            for chunkId in chunkIds
+        }
@@ -1,31 +1,58 @@
 import os
+import json
 import glob
-import gzip
+import pickle
+import time
+import heapq
+import shutil
+import hashlib
+import asyncio
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import wait
+from itertools import groupby
+from itertools import product
+from operator import itemgetter
 from pathlib import Path
 from multiprocessing import Pool
 from typing import List
 from types import GeneratorType
 
 from hypergol.delayed import Delayed
+from hypergol.utils import get_hash
 from hypergol.dataset import Dataset
+from hypergol.datachunk import DataChunk
+from hypergol.datachunk import DataChunkChecksum
 
 from hypergol.job import Job
 from hypergol.job_report import JobReport
 from hypergol.repr import Repr
 from hypergol.logger import Logger
 from hypergol.dataset_factory import DatasetFactory
+from hypergol.shuffle_writer import ShuffleWriter
+from hypergol.shuffle_writer import SHUFFLE_MANIFEST_FILENAME
 from hypergol.dataset import DatasetAlreadyExistsException
 
+JOIN_MODES = ['inner', 'left', 'outer']
+EXECUTOR_MODES = ['process', 'thread', 'asyncio']
+FINGERPRINT_EXCLUDED_MEMBERS = {
+    'outputDataset', 'inputDatasets', 'loadedInputDatasets', 'temporaryDatasetFactory', 'logger', 'threads', 'logAtEachN', 'debug', 'prefetch', 'shuffle', 'splitSize', 'checkpointEvery', 'batchSize', 'executor', 'concurrency',
+    'output', 'inputChunks', 'loadedData', 'results', 'exceptions', 'counter', 'jobId', 'jobTotal', 'inputWaitTime', 'part'
+}
+
 
 class SourceIteratorNotIterableException(Exception):
     pass
 
 
-class Task(Repr):
+# Every constructor parameter is a member so the task can be copied into the worker processes as it is, the rest is the state of the job being executed
+class Task(Repr):  # pylint: disable=too-many-instance-attributes
     """Class to create other datasets, created domain objects in :func:`run()` must be appended to the output with ``self.output.append(object)`` (any number of the same type)
     """
 
-    def __init__(self, outputDataset: Dataset, inputDatasets: List[Dataset] = None, loadedInputDatasets: List[Dataset] = None, logger=None, threads=None, logAtEachN=0, debug=False, force=False):
+    def __init__(self, outputDataset: Dataset, inputDatasets: List[Dataset] = None, loadedInputDatasets: List[Dataset] = None, logger=None, threads=None, logAtEachN=0, debug=False, force=False, prefetch=0, join=None, shuffle=0, splitSize=0, checkpointEvery=0, batchSize=0, executor='process', concurrency=1):
         """
         Parameters
         ----------
@@ -46,6 +73,22 @@ class Task(Repr):
             If true errors during execution stop the pipeline, otherwise they just get logged.
         force: bool = False
             All input object's hashes must match in a single run() call. Use ``force=True`` to override this.
+        prefetch: int = 0
+            If not zero, this many objects of each input chunk are read ahead on a background thread while ``run()`` is processing the previous ones. The time ``run()`` waited for its input is reported in the job report's ``statistics``.
+        join: str = None
+            By default the objects of the input datasets are matched by their position in the chunks. With ``'inner'``, ``'left'`` or ``'outer'`` they are matched by their :term:`hash id` instead: ``run()`` receives the objects with the same hash id (all combinations if there are more in a dataset) and None in place of a missing object. Inner join skips hash ids missing from any dataset, left join the ones missing from the first dataset. Chunks of datasets that are sorted by hash (see :class:`Dataset`) are streamed, others are sorted in memory.
+        shuffle: int = 0
+            If not zero, each job writes its output through a :class:`ShuffleWriter` that keeps this many bytes of records in memory and writes them into a few run files, instead of a temporary dataset that keeps a file open for each output chunk. Use it for outputs with many chunks.
+        splitSize: int = 0
+            If not zero, jobs with more input records than this (according to the ``.stats`` file of the first input dataset) are split into jobs that process consecutive ranges of the records. The output is the same as without splitting, but large chunks don't keep the other processes waiting at the end of the task. Loaded input datasets are loaded by each job, cannot be used with ``join``.
+        checkpointEvery: int = 0
+            If not zero, after each this many inputs the output written so far is saved and the job can continue from that point if the pipeline is resumed (see :func:`Pipeline.run()`). The output is the same as without checkpoints, but ``source_iterator()`` must yield the same inputs in the same order when the job is resumed (the inputs before the checkpoint are skipped).
+        batchSize: int = 0
+            If not zero, the inputs are collected into lists of this many tuples and passed onto ``run_batch()`` instead of calling ``run()`` for each of them (the last batch of a job can be shorter). Use it for libraries that process many objects at once (e.g.: ``spacy.pipe()`` or model inference). An exception in ``run_batch()`` is logged once for the batch. Checkpoints are saved after the batch that reaches the next multiple of ``checkpointEvery``.
+        executor: str = 'process'
+            How ``run()`` (or ``run_batch()``) is called in a job: ``'process'`` calls it for one input at a time, ``'thread'`` calls it from ``concurrency`` threads (appends to ``self.output`` are synchronised) and ``'asyncio'`` requires ``async def run()`` and awaits ``concurrency`` calls at the same time. Use threads or asyncio for tasks that wait for the network or the disk. The jobs are run in processes in all modes, the order of the output records may differ from the order of the inputs with more than one concurrent call.
+        concurrency: int = 1
+            The number of concurrent calls of ``run()`` in a job with ``executor='thread'`` or ``executor='asyncio'``
         """
         self.outputDataset = outputDataset
         self.inputDatasets = inputDatasets or []
@@ -59,6 +102,23 @@ class Task(Repr):
         self.logAtEachN = logAtEachN
         self.debug = debug
         self.force = force
+        self.prefetch = prefetch
+        if join is not None and join not in JOIN_MODES:
+            raise ValueError(f'Invalid join mode: {join} in {self.__class__.__name__}, valid values are: {", ".join(JOIN_MODES)}')
+        self.join = join
+        if join is not None and splitSize > 0:
+            raise ValueError(f'Jobs cannot be split if the inputs are joined in {self.__class__.__name__}')
+        self.shuffle = shuffle
+        self.splitSize = splitSize
+        self.checkpointEvery = checkpointEvery
+        self.batchSize = batchSize
+        if executor not in EXECUTOR_MODES:
+            raise ValueError(f'Invalid executor: {executor} in {self.__class__.__name__}, valid values are: {", ".join(EXECUTOR_MODES)}')
+        if executor == 'asyncio' and not inspect.iscoroutinefunction(self.run_batch if batchSize > 0 else self.run):
+            raise ValueError(f'{self.__class__.__name__} must implement {"run_batch()" if batchSize > 0 else "run()"} with async def if executor is asyncio')
+        self.executor = executor
+        self.concurrency = concurrency
+        self.part = 0
         self.output = None      # <------- Append data modell instances to this variable in the run() function to be saved in the output dataset
         self.inputChunks = None
         self.loadedData = None
@@ -67,12 +127,17 @@ class Task(Repr):
         self.counter = 0
         self.jobId = None
         self.jobTotal = None
+        self.inputWaitTime = 0.0
         self.temporaryDatasetFactory = DatasetFactory(
             location=outputDataset.location,
             project='temp',
             branch=f'{outputDataset.name}_temp',
             chunkCount=outputDataset.chunkCount,
-            repoData=outputDataset.repoData
+            repoData=outputDataset.repoData,
+            codec=outputDataset.codec,
+            serializer=outputDataset.serializer,
+            indexed=outputDataset.indexed,
+            sortedByHash=outputDataset.sortedByHash
         )
 
     def check_if_output_exists(self):
@@ -81,9 +146,218 @@ class Task(Repr):
         if os.path.exists(self.temporaryDatasetFactory.branchDirectory):
             raise DatasetAlreadyExistsException(f"Temporary data location {self.temporaryDatasetFactory.branchDirectory} already exists, delete the directory first")
 
-    def _get_temporary_dataset(self, jobId):
-        """Based on the input chunk creates a temporary dataset and opens all chunks for writing so that the various output classes can be appended to the right chunk"""
-        return self.temporaryDatasetFactory.get(dataType=self.outputDataset.dataType, name=f'{self.outputDataset.name}_{jobId:03}')
+    def is_finished(self):
+        """True if the task was finalised, the ``.chk`` file of the output dataset is created after all its chunks are merged (datasets created with earlier versions don't have a ``.stats`` file)"""
+        return self.outputDataset.exists() and self.outputDataset.chkFile.exists()
+
+    def get_fingerprint(self):
+        """Hash of everything that determines the output of the task: the class and its source code (with the source of its base classes), the members of the task that are not related to the execution (e.g.: ``threads``), the checksums of the chunks of the input datasets and the format of the output dataset. It is saved in the output dataset's ``.def`` file.
+
+        Returns None if the source code is not available (e.g.: the class was defined in a notebook), such outputs are never reused.
+        """
+        try:
+            code = [inspect.getsource(classType) for classType in self.__class__.__mro__ if issubclass(classType, Task) and classType is not Task]
+        except (OSError, TypeError):
+            return None
+        parameters = {key: _get_canonical_data(value) for key, value in self.__dict__.items() if key not in FINGERPRINT_EXCLUDED_MEMBERS}
+        fingerprintData = {
+            'task': f'{self.__class__.__module__}.{self.__class__.__qualname__}',
+            'code': hashlib.sha1(''.join(code).encode('utf-8')).hexdigest(),
+            'parameters': hashlib.sha1(json.dumps(parameters, sort_keys=True).encode('utf-8')).hexdigest(),
+            'inputs': [dataset.chkFile.get_content_checksum() for dataset in self.inputDatasets + self.loadedInputDatasets],
+            'output': {
+                'dataType': self.outputDataset.dataType.__name__,
+                'chunkCount': self.outputDataset.chunkCount,
+                'codec': self.outputDataset.codec.to_data(),
+                'serializer': self.outputDataset.serializer.to_data(),
+                'indexed': self.outputDataset.indexed,
+                'sortedByHash': self.outputDataset.sortedByHash
+            }
+        }
+        return hashlib.sha1(json.dumps(fingerprintData, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def load_cached_output(self):
+        """Reuses the output of a previous run of the task with the same fingerprint (see :func:`get_fingerprint()`), used by :func:`Pipeline.run()` with ``cache=True``
+
+        If the output dataset is finished and its fingerprint matches, there is nothing to do, if it doesn't match, the dataset is deleted. Otherwise the dataset with the same name is looked up in the other branches of the project and if its fingerprint matches, its files are hard linked (or copied if that's not possible) into the output dataset with a new ``.def`` and ``.chk`` file (the ``.def`` file records the branch in ``cachedFrom``).
+
+        Returns True if the output can be reused and the task doesn't need to be executed.
+        """
+        fingerprint = self.get_fingerprint()
+        if fingerprint is None:
+            return False
+        if self.is_finished():
+            if self.outputDataset.defFile.get_def_file_data().get('fingerprint') == fingerprint:
+                return True
+            self.logger.info(f'{self.__class__.__name__} - output {self.outputDataset.name} was created by a different version of the task, deleting it')
+            self.outputDataset.delete()
+        pattern = Path(self.outputDataset.location, self.outputDataset.project, '*', self.outputDataset.name, f'{self.outputDataset.name}.def')
+        for defFilename in sorted(glob.glob(str(pattern))):
+            cachedDataset = Dataset(
+                dataType=self.outputDataset.dataType,
+                location=self.outputDataset.location,
+                project=self.outputDataset.project,
+                branch=Path(defFilename).parent.parent.name,
+                name=self.outputDataset.name
+            )
+            if cachedDataset.branch == self.outputDataset.branch or not cachedDataset.chkFile.exists():
+                continue
+            if cachedDataset.defFile.get_def_file_data().get('fingerprint') == fingerprint:
+                self._link_output(cachedDataset=cachedDataset, fingerprint=fingerprint)
+                return True
+        return False
+
+    def _link_output(self, cachedDataset, fingerprint):
+        """Creates the output dataset from the files of a dataset in another branch, the ``.stats`` file is copied because it is rewritten if the dataset is appended to"""
+        self.outputDataset.init('w')
+        for fileName in glob.glob(f'{cachedDataset.directory}/*'):
+            if fileName.endswith('.def') or fileName.endswith('.chk'):
+                continue
+            targetFileName = Path(self.outputDataset.directory, Path(fileName).name)
+            if fileName.endswith('.stats'):
+                shutil.copyfile(fileName, targetFileName)
+                continue
+            try:
+                os.link(fileName, targetFileName)
+            except OSError:
+                shutil.copyfile(fileName, targetFileName)
+        self.outputDataset.segmentCount = cachedDataset.defFile.get_def_file_data().get('segmentCount', 1)
+        self.outputDataset.defFile.update_def_file(fingerprint=fingerprint, segmentCount=self.outputDataset.segmentCount, cachedFrom=cachedDataset.branch)
+        self.outputDataset.chkFile.copy_chk_file(dataset=cachedDataset)
+
+    def _get_temporary_dataset(self, jobId, part=0):
+        """Based on the input chunk creates a temporary dataset and opens all chunks for writing so that the various output classes can be appended to the right chunk, after each checkpoint the job writes a new part (``{name}_{jobId:03}_{part:03}``)"""
+        name = f'{self.outputDataset.name}_{jobId:03}' if part == 0 else f'{self.outputDataset.name}_{jobId:03}_{part:03}'
+        return self.temporaryDatasetFactory.get(dataType=self.outputDataset.dataType, name=name)
+
+    def _get_temporary_datasets(self):
+        """Returns the temporary datasets (or :class:`ShuffleWriter` directories) of all the jobs and parts in the order they are merged"""
+        names = [
+            Path(directory).name
+            for directory in glob.glob(f'{self.temporaryDatasetFactory.branchDirectory}/{self.outputDataset.name}_*')
+            if os.path.isdir(directory)
+        ]
+        return [
+            self.temporaryDatasetFactory.get(dataType=self.outputDataset.dataType, name=name)
+            for name in sorted(names, key=lambda name: _get_temporary_position(name=name, outputName=self.outputDataset.name))
+        ]
+
+    def _get_job_file_name(self, jobId, extension):
+        """Name of the checkpoint (``.checkpoint``) and completion marker (``.done``) files of a job next to its temporary datasets"""
+        return Path(self.temporaryDatasetFactory.branchDirectory, f'{self.outputDataset.name}_{jobId:03}.{extension}')
+
+    def _delete_job_output(self, jobId, fromPart=0):
+        """Deletes the temporary datasets of a job from the given part, e.g.: the ones a crashed job left behind, only the directories of this job are looked up"""
+        jobDirectory = f'{self.temporaryDatasetFactory.branchDirectory}/{self.outputDataset.name}_{jobId:03}'
+        for directory in glob.glob(jobDirectory) + glob.glob(f'{jobDirectory}_*'):
+            temporaryJobId, part = _get_temporary_position(name=Path(directory).name, outputName=self.outputDataset.name)
+            if os.path.isdir(directory) and temporaryJobId == jobId and part >= fromPart:
+                _delete_directory(directory=directory)
+
+    def _delete_job(self, jobId):
+        """Deletes everything a job created so it is executed from the beginning"""
+        for extension in ['done', 'checkpoint']:
+            if os.path.exists(self._get_job_file_name(jobId=jobId, extension=extension)):
+                os.remove(self._get_job_file_name(jobId=jobId, extension=extension))
+        self._delete_job_output(jobId=jobId)
+
+    def _load_checkpoint(self, job):
+        """Loads the last checkpoint of the job, if there is none (or it was created for a different set of jobs) the job starts from the beginning"""
+        checkpoint = {'total': job.total, 'partCount': 0, 'inputCount': 0, 'results': {}, 'exceptions': False}
+        fileName = self._get_job_file_name(jobId=job.id, extension='checkpoint')
+        if not os.path.exists(fileName):
+            return checkpoint
+        with open(fileName, 'rb') as checkpointFile:
+            savedCheckpoint = pickle.load(checkpointFile)
+        if savedCheckpoint['total'] != job.total:
+            self._delete_job(jobId=job.id)
+            return checkpoint
+        return savedCheckpoint
+
+    def _save_checkpoint(self, job, inputCount):
+        """Closes the current part of the output, records the number of inputs processed and opens the next part"""
+        self.output.close()
+        self.part += 1
+        _save_pickle(fileName=self._get_job_file_name(jobId=job.id, extension='checkpoint'), data={
+            'total': job.total,
+            'partCount': self.part,
+            'inputCount': inputCount,
+            'results': self.results,
+            'exceptions': self.exceptions
+        })
+        self.output = self._get_output_writer(jobId=job.id, part=self.part)
+        self.log(f'Checkpoint - inputs: {inputCount}')
+
+    def _save_job_report(self, job, jobReport):
+        """Writes the completion marker of the job with the content of the ``.chk`` files of its temporary datasets"""
+        checksums = []
+        for part in range(self.part + 1):
+            chkFilename = self._get_temporary_dataset(jobId=job.id, part=part).chkFile.chkFilename
+            checksums.append(open(chkFilename, 'rt').read() if os.path.exists(chkFilename) else None)
+        _save_pickle(fileName=self._get_job_file_name(jobId=job.id, extension='done'), data={
+            'total': job.total,
+            'jobReport': jobReport,
+            'checksums': checksums
+        })
+
+    def get_finished_job_reports(self, jobs):
+        """Finds the jobs that finished without exceptions in a previous run of the task, used in resuming a pipeline
+
+        The completion marker of each job is checked against the temporary datasets, everything created by jobs that failed is deleted, so they are executed again from the beginning. Jobs without a marker continue from their last checkpoint. A partially merged output dataset (without a ``.chk`` file) is deleted, a finished one raises :class:`DatasetAlreadyExistsException`.
+
+        Parameters
+        ----------
+        jobs : List[Job]
+            Jobs of the task as returned by :func:`get_jobs()`
+
+        Returns a dictionary of job id and the :class:`JobReport` of the finished jobs.
+        """
+        if self.outputDataset.chkFile.exists():
+            raise DatasetAlreadyExistsException(f"Dataset {self.outputDataset.directory} is already finished, it is not resumed")
+        if os.path.isdir(self.outputDataset.directory):
+            _delete_directory(directory=self.outputDataset.directory)
+        jobReports = {}
+        for job in jobs:
+            fileName = self._get_job_file_name(jobId=job.id, extension='done')
+            if not os.path.exists(fileName):
+                continue
+            with open(fileName, 'rb') as markerFile:
+                marker = pickle.load(markerFile)
+            if marker['total'] == job.total and not marker['jobReport'].exceptions and self._is_job_output_valid(jobId=job.id, checksums=marker['checksums']):
+                jobReports[job.id] = marker['jobReport']
+            else:
+                self._delete_job(jobId=job.id)
+        for temporaryDataset in self._get_temporary_datasets():
+            jobId, _ = _get_temporary_position(name=temporaryDataset.name, outputName=self.outputDataset.name)
+            if jobId >= len(jobs):
+                self._delete_job(jobId=jobId)
+        return jobReports
+
+    def _is_job_output_valid(self, jobId, checksums):
+        """True if the temporary datasets of a job are the same as when the job finished"""
+        for part, checksum in enumerate(checksums):
+            temporaryDataset = self._get_temporary_dataset(jobId=jobId, part=part)
+            if checksum is None:
+                if not os.path.exists(Path(temporaryDataset.directory, SHUFFLE_MANIFEST_FILENAME)):
+                    return False
+                continue
+            chkFilename = temporaryDataset.chkFile.chkFilename
+            if not os.path.exists(chkFilename) or open(chkFilename, 'rt').read() != checksum:
+                return False
+            if not all(os.path.exists(Path(temporaryDataset.directory, fileName)) for fileName in json.loads(checksum)):
+                return False
+        return True
+
+    def _get_output_writer(self, jobId, part=0):
+        """Creates the object ``run()`` appends the output to: a temporary dataset's :class:`DatasetWriter` or a :class:`ShuffleWriter` in the same directory"""
+        temporaryDataset = self._get_temporary_dataset(jobId=jobId, part=part)
+        if self.shuffle > 0:
+            writer = ShuffleWriter(dataset=self.outputDataset, directory=temporaryDataset.directory, bufferSize=self.shuffle)
+        else:
+            writer = temporaryDataset.open('w')
+        if self.executor == 'thread':
+            return _SynchronisedWriter(writer=writer)
+        return writer
 
     def log(self, message):
         """Standard logging"""
@@ -101,19 +375,48 @@ class Task(Repr):
             self.log(f'Processed: {self.counter}')
 
     def get_jobs(self):
-        """Generates a list of :class:`Job` to be processed"""
-        chunkCounts = {v.chunkCount for v in self.inputDatasets + self.loadedInputDatasets}
-        if len(chunkCounts) > 1:
-            raise ValueError(f'{self.__class__.__name__}: All datasets must have the same number of chunks: {chunkCounts}')
-        jobs = [Job(id_=id_, total=self.inputDatasets[0].chunkCount) for id_ in range(self.inputDatasets[0].chunkCount)]
+        """Generates a list of :class:`Job` to be processed
+
+        There is a job for each chunk of the dataset with the fewest chunks. Chunk ids are hash prefixes, so the chunks of datasets with more chunks are grouped into a :class:`DataChunkGroup` for each job (e.g.: job ``a`` reads chunks ``a0``-``af`` of a dataset with 256 chunks).
+
+        If the first input dataset has a ``.stats`` file, each job's number of input records is set (the pipeline starts the largest jobs first) and, if ``splitSize`` is set, large jobs are split into jobs of record ranges of the same chunks.
+        """
+        chunkCount = min(v.chunkCount for v in self.inputDatasets + self.loadedInputDatasets)
+        jobs = [Job(id_=id_, total=chunkCount) for id_ in range(chunkCount)]
         for inputDataset in self.inputDatasets:
-            for id_, inputChunk in enumerate(inputDataset.get_data_chunks(mode='r')):
+            for id_, inputChunk in enumerate(inputDataset.get_data_chunk_groups(chunkCount=chunkCount)):
                 jobs[id_].inputChunks.append(inputChunk)
         for loadedInputDataset in self.loadedInputDatasets:
-            for id_, loadedInputChunk in enumerate(loadedInputDataset.get_data_chunks(mode='r')):
+            for id_, loadedInputChunk in enumerate(loadedInputDataset.get_data_chunk_groups(chunkCount=chunkCount)):
                 jobs[id_].loadedInputChunks.append(loadedInputChunk)
+        if len(self.inputDatasets) == 0 or not self.inputDatasets[0].statsFile.exists():
+            return jobs
+        chunkStats = self.inputDatasets[0].statsFile.get_stats_file_data()['chunks']
+        for job in jobs:
+            job.recordCount = sum(stats['recordCount'] for chunkId, stats in chunkStats.items() if chunkId.startswith(job.inputChunks[0].chunkId))
+        if self.splitSize > 0:
+            return self._split_jobs(jobs=jobs)
         return jobs
 
+    def _split_jobs(self, jobs):
+        """Splits the jobs with more than ``splitSize`` input records into jobs of equal record ranges, the ids are renumbered so the outputs are merged in the original order"""
+        splitJobs = []
+        for job in jobs:
+            splitCount = max(1, -(-job.recordCount // self.splitSize))
+            boundaries = [job.recordCount * k // splitCount for k in range(splitCount)] + [None]
+            for start, end in zip(boundaries[:-1], boundaries[1:]):
+                splitJobs.append(Job(
+                    id_=len(splitJobs),
+                    total=0,
+                    inputChunks=job.inputChunks,
+                    loadedInputChunks=job.loadedInputChunks,
+                    recordRange=(start, end) if splitCount > 1 else None,
+                    recordCount=(end or job.recordCount) - start
+                ))
+        for job in splitJobs:
+            job.total = len(splitJobs)
+        return splitJobs
+
     def execute(self, job: Job):
         """Organising the execution of the task, see Tutorial/Task for a detailed description of steps
 
@@ -124,29 +427,128 @@ class Task(Repr):
         """
         self.jobId = job.id
         self.jobTotal = job.total
+        self.part = 0
         self.log('Execute - START')
         try:
+            checkpoint = self._load_checkpoint(job=job)
+            self._delete_job_output(jobId=job.id, fromPart=checkpoint['partCount'])
             self._open_input_chunks(job=job)
             self.initialise()
-            with self._get_temporary_dataset(jobId=job.id).open('w') as self.output:
+            if checkpoint['partCount'] > 0:
+                self.log(f'Resuming from checkpoint - inputs: {checkpoint["inputCount"]}')
+                self.results = checkpoint['results']
+                self.exceptions = checkpoint['exceptions']
+            self.part = checkpoint['partCount']
+            self.output = self._get_output_writer(jobId=job.id, part=self.part)
+            try:
                 sourceIterator = self.source_iterator(parameters=job.parameters)
                 if not isinstance(sourceIterator, GeneratorType):
                     raise SourceIteratorNotIterableException(f'{self.__class__.__name__}.source_iterator is not iterable, use yield instead of return')
-                for inputData in sourceIterator:
-                    self.log_counter()
-                    try:
-                        self.run(*inputData, *self.loadedData)
-                    except Exception as ex:  # pylint: disable=broad-except
-                        self.log_exception(ex)
+                batches = self._get_batches(sourceIterator=sourceIterator, skipCount=checkpoint['inputCount'])
+                if self.executor == 'thread':
+                    self._process_batches_in_threads(job=job, batches=batches)
+                elif self.executor == 'asyncio':
+                    asyncio.run(self._process_batches_async(job=job, batches=batches))
+                else:
+                    self._process_batches(job=job, batches=batches)
+            finally:
+                self.output.close()
             self._close_input_chunks()
             self.log_counter(final=True)
         except Exception as ex:  # pylint: disable=broad-except
             self.log_exception(ex)
-        self.log('Execute - END')
-        jobReport = JobReport(jobId=job.id, exceptions=self.exceptions, results=self.results)
+        self.log(f'Execute - END - input wait time: {self.inputWaitTime:.3f}s')
+        jobReport = JobReport(jobId=job.id, exceptions=self.exceptions, results=self.results, statistics={'inputWaitTime': self.inputWaitTime})
         self.finish_job(jobReport=jobReport)
+        self._save_job_report(job=job, jobReport=jobReport)
         return jobReport
 
+    def _get_batches(self, sourceIterator, skipCount):
+        """Skips the inputs before the checkpoint and yields the number of inputs read and the next batch of inputs (a single input if ``batchSize`` is not set)"""
+        batch = []
+        inputCount = skipCount
+        for inputCount, inputData in enumerate(self._measure_input_wait_time(iterator=sourceIterator), 1):
+            if inputCount <= skipCount:
+                continue
+            self.log_counter()
+            batch.append(inputData)
+            if len(batch) >= max(1, self.batchSize):
+                yield inputCount, batch
+                batch = []
+        if len(batch) > 0:
+            yield inputCount, batch
+
+    def _call_run(self, batch):
+        """Passes the inputs onto ``run()`` or ``run_batch()`` if ``batchSize`` is set"""
+        if self.batchSize > 0:
+            return self.run_batch(batch, *self.loadedData)
+        return self.run(*batch[0], *self.loadedData)
+
+    def _is_checkpoint(self, inputCount, batch):
+        """Checks if the batch reached the next multiple of ``checkpointEvery``"""
+        return self.checkpointEvery > 0 and inputCount // self.checkpointEvery > (inputCount - len(batch)) // self.checkpointEvery
+
+    def _process_batches(self, job, batches):
+        """Calls ``run()`` for each batch one after the other"""
+        for inputCount, batch in batches:
+            try:
+                self._call_run(batch=batch)
+            except Exception as ex:  # pylint: disable=broad-except
+                self.log_exception(ex)
+            if self._is_checkpoint(inputCount=inputCount, batch=batch):
+                self._save_checkpoint(job=job, inputCount=inputCount)
+
+    def _process_batches_in_threads(self, job, batches):
+        """Calls ``run()`` from ``concurrency`` threads, before a checkpoint all the previous calls are finished"""
+        pending = set()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as threadPool:
+            for inputCount, batch in batches:
+                if len(pending) >= self.concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    self._log_exceptions(futures=done)
+                pending.add(threadPool.submit(self._call_run, batch))
+                if self._is_checkpoint(inputCount=inputCount, batch=batch):
+                    self._log_exceptions(futures=wait(pending).done)
+                    pending = set()
+                    self._save_checkpoint(job=job, inputCount=inputCount)
+            self._log_exceptions(futures=wait(pending).done)
+
+    async def _process_batches_async(self, job, batches):
+        """Awaits ``concurrency`` calls of ``async def run()`` at the same time, before a checkpoint all the previous calls are finished"""
+        pending = set()
+        for inputCount, batch in batches:
+            if len(pending) >= self.concurrency:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                self._log_exceptions(futures=done)
+            pending.add(asyncio.ensure_future(self._call_run(batch=batch)))
+            await asyncio.sleep(0)
+            if self._is_checkpoint(inputCount=inputCount, batch=batch):
+                self._log_exceptions(futures=(await asyncio.wait(pending))[0] if len(pending) > 0 else [])
+                pending = set()
+                self._save_checkpoint(job=job, inputCount=inputCount)
+        if len(pending) > 0:
+            self._log_exceptions(futures=(await asyncio.wait(pending))[0])
+
+    def _log_exceptions(self, futures):
+        """Logs the exceptions of the finished calls of ``run()``"""
+        for future in futures:
+            if future.exception() is not None:
+                self.log_exception(future.exception())
+
+    def _measure_input_wait_time(self, iterator):
+        """Measures the time spent waiting for the next input of ``run()``"""
+        self.inputWaitTime = 0.0
+        iterator = iter(iterator)
+        while True:
+            start = time.perf_counter()
+            try:
+                inputData = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.inputWaitTime += time.perf_counter() - start
+            yield inputData
+
     def initialise(self):
         """After opening input chunks and loading loaded inputs, creates :term:`delayed` classes, initialises the results to be returned in JobReports and calls the task's custom `init()`"""
         for k, v in self.__dict__.items():
@@ -160,7 +562,7 @@ class Task(Repr):
 
     def _open_input_chunks(self, job):
         """Opens input chunks and loads loaded input chunks"""
-        self.inputChunks = [inputChunk.open() for inputChunk in job.inputChunks]
+        self.inputChunks = [inputChunk.open(prefetch=self.prefetch, recordRange=job.recordRange) for inputChunk in job.inputChunks]
         self.loadedData = []
         for loadInputChunk in job.loadedInputChunks:
             self.loadedData.append(list(loadInputChunk.open()))
@@ -169,11 +571,27 @@ class Task(Repr):
     def source_iterator(self, parameters):
         if len(parameters) > 0:
             raise ValueError('source_iterators in Tasks with inputDatasets cannot have job parameters, pass data as member variables of the Task')
+        if self.join is not None:
+            yield from self._join_input_chunks()
+            return
         for inputValues in zip(*self.inputChunks):
             if not self.force and len({value.get_hash_id() for value in inputValues}) > 1:
                 raise ValueError(f'different hashIds in a tuple of input values, set force=True in {self.__class__.__name__} to continue')
             yield inputValues
 
+    def _join_input_chunks(self):
+        """Merges the input chunks ordered by hashed :term:`hash id` and yields the tuples of objects with the same hash id according to the join mode"""
+        keyedInputs = [_get_keyed_values(inputChunk=inputChunk, position=k) for k, inputChunk in enumerate(self.inputChunks)]
+        for _, group in groupby(heapq.merge(*keyedInputs, key=itemgetter(0)), key=itemgetter(0)):
+            values = [[] for _ in self.inputChunks]
+            for _, position, value in group:
+                values[position].append(value)
+            if self.join == 'inner' and any(len(value) == 0 for value in values):
+                continue
+            if self.join == 'left' and len(values[0]) == 0:
+                continue
+            yield from product(*[value or [None] for value in values])
+
     def run(self, *args):
         """This is the main computation of the task
 
@@ -184,6 +602,18 @@ class Task(Repr):
         """
         raise NotImplementedError(f'run() function must be implemented in {self.__class__.__name__}')
 
+    def run_batch(self, batch, *args):
+        """The main computation of the task if ``batchSize`` is set, called instead of :func:`run()` with many inputs at once
+
+        Parameters
+        ----------
+        batch: List[Tuple[object]]
+            list of at most ``batchSize`` tuples, each of them contains the objects that would be passed onto ``run()`` from the `inputDatasets`
+        args: List[object]
+            after the batch a list of domain objects which is the entire list from the `loadedInputDatasets` list.
+        """
+        raise NotImplementedError(f'run_batch() function must be implemented in {self.__class__.__name__} if batchSize is set')
+
     def _close_input_chunks(self):
         """Closes input chunks"""
         for inputChunk in self.inputChunks:
@@ -192,15 +622,21 @@ class Task(Repr):
     def finish_job(self, jobReport):
         """User-defined finalisation in each thread. Close file handlers or release memory of non-python objects here if necessary"""
 
-    def finalise(self, jobReports, threads):
+    def finalise(self, jobReports, threads, pool=None, onChunkMerged=None):
         """After func:`execute` finished, all the temporary datasets are opened and copied into the output dataset in a multithreaded way.
 
+        If all the objects of an output chunk were created by the same job (e.g.: the input and output have the same number of chunks and the task keeps the hash ids), the temporary chunk file is moved into the output dataset instead of being copied.
+
         Parameters
         ----------
             jobReports : List[JobReport]
                 Reports on the executed jobs
             threads :
                 Number of concurrent threads to do the merging
+            pool : multiprocessing.Pool = None
+                Processes to do the merging in (e.g.: the ones :class:`Pipeline` executed the jobs in), if None, a new pool is created with ``threads`` processes
+            onChunkMerged : callable = None
+                Called with the chunk id of each output chunk as soon as it is written (in the order they finish), the chunks can be read before the ``.chk`` file is created at the end
         """
         jobs = []
         for k, chunk in enumerate(self.outputDataset.get_data_chunks(mode='w')):
@@ -212,21 +648,39 @@ class Task(Repr):
                     'chunk': chunk,
                     'logger': self.logger
                 }))
-        pool = Pool(self.threads or threads)
-        checksums = pool.map(_merge_function, jobs)
-        pool.close()
-        pool.join()
-        pool.terminate()
-        for jobId in range(len(jobReports)):
-            temporaryDataset = self._get_temporary_dataset(jobId=jobId)
-            temporaryDataset.delete()
+        temporaryDatasets = self._get_temporary_datasets()
+        if self.shuffle > 0:
+            shuffleBlocks = [
+                ShuffleWriter.load_blocks(directory=temporaryDataset.directory, chunkIds=self.outputDataset.get_chunk_ids())
+                for temporaryDataset in temporaryDatasets
+            ]
+            for job in jobs:
+                job.parameters['blocks'] = [block for blocks in shuffleBlocks for block in blocks[job.parameters['chunk'].chunkId]]
+        mergePool = pool or Pool(self.threads or threads)
+        checksums = []
+        for checksum in mergePool.imap_unordered(_shuffle_merge_function if self.shuffle > 0 else _merge_function, jobs):
+            checksums.append(checksum)
+            if onChunkMerged is not None:
+                onChunkMerged(checksum.chunk.chunkId)
+        if pool is None:
+            mergePool.close()
+            mergePool.join()
+            mergePool.terminate()
+        for temporaryDataset in temporaryDatasets:
+            _delete_directory(directory=temporaryDataset.directory)
+        for jobReport in jobReports:
+            for extension in ['done', 'checkpoint']:
+                if os.path.exists(self._get_job_file_name(jobId=jobReport.jobId, extension=extension)):
+                    os.remove(self._get_job_file_name(jobId=jobReport.jobId, extension=extension))
         temporayBranchDirectory = Path(self.outputDataset.location, 'temp', f'{self.outputDataset.name}_temp')
         try:
             if os.path.exists(temporayBranchDirectory):
                 os.rmdir(temporayBranchDirectory)
         except OSError as ex:
             self.log(f'temporary directory cannot be deleted {ex}')
+        self.outputDataset.defFile.update_def_file(fingerprint=self.get_fingerprint())
         self.outputDataset.chkFile.make_chk_file(checksums=checksums)
+        self.outputDataset.statsFile.make_stats_file(checksums=checksums)
         self.finish_task(jobReports=jobReports, threads=threads)
 
     def finish_task(self, jobReports, threads):
@@ -236,19 +690,180 @@ class Task(Repr):
 def _merge_function(job):
     """This is the actual function that is running multithreaded. This function must be external to the ``Task`` class because, after initialising and execution, it is not possible to ensure that the ``Task`` class is pickle-able.
 
-    Returns the checksum so the caller can create the ``.chk`` file.
+    Returns the checksum so the caller can create the ``.chk`` file, the chunk in it carries the statistics for the ``.stats`` file. If only one of the temporary chunks has any data, that file is moved in place, otherwise the compressed temporary files are concatenated (see :func:`DataChunk.concatenate()`). Datasets sorted by hash must be merged record by record.
     """
     chunk = job.parameters['chunk']
     logger = job.parameters['logger']
     logger.log(f'{job.parameters["name"]} - {job.id:3}/{job.total:3} - finish - START')
-    chunk.open()
     pattern = str(Path(
         chunk.dataset.location, 'temp', f'{chunk.dataset.name}_temp',
-        f'{chunk.dataset.name}_*', f'*_{chunk.chunkId}.jsonl.gz'
+        f'{chunk.dataset.name}_*', f'*_{chunk.chunkId}{chunk.dataset.fileExtension}'
     ))
-    for filePath in sorted(glob.glob(pattern)):
-        with gzip.open(filePath, 'rt') as inputFile:
-            for line in inputFile:
-                chunk.write(line)
+    filePaths = sorted(glob.glob(pattern), key=lambda filePath: _get_temporary_position(name=Path(filePath).parent.name, outputName=chunk.dataset.name))
+    temporaryStats = [_get_temporary_chunk_stats(filePath=filePath, chunkId=chunk.chunkId) for filePath in filePaths]
+    nonEmptyPositions = [k for k, stats in enumerate(temporaryStats) if stats['recordCount'] > 0]
+    if len(filePaths) > 0 and len(nonEmptyPositions) <= 1:
+        position = nonEmptyPositions[0] if len(nonEmptyPositions) > 0 else 0
+        checksum = _move_temporary_chunk(filePath=filePaths[position], chunk=chunk, stats=temporaryStats[position])
+        logger.log(f'{job.parameters["name"]} - {job.id:3}/{job.total:3} - finish - END - moved')
+        return checksum
+    if chunk.dataset.sortedByHash:
+        chunk.open(sort=False)
+        temporaryRecords = [_get_temporary_chunk(filePath=filePath, chunk=chunk).read_records(withHashKeys=True) for filePath in filePaths]
+        for record, hashKey in heapq.merge(*temporaryRecords, key=itemgetter(1)):
+            chunk.write(record, hashKey=hashKey)
+        logger.log(f'{job.parameters["name"]} - {job.id:3}/{job.total:3} - finish - END')
+        return chunk.close()
+    checksum = chunk.concatenate(
+        fileNames=[filePaths[position] for position in nonEmptyPositions],
+        stats=[temporaryStats[position] for position in nonEmptyPositions]
+    )
+    logger.log(f'{job.parameters["name"]} - {job.id:3}/{job.total:3} - finish - END')
+    return checksum
+
+
+def _shuffle_merge_function(job):
+    """Creates an output chunk from the blocks the :class:`ShuffleWriter`-s of the jobs wrote, the blocks are copied without recompression unless the dataset is sorted by hash"""
+    chunk = job.parameters['chunk']
+    blocks = job.parameters['blocks']
+    logger = job.parameters['logger']
+    logger.log(f'{job.parameters["name"]} - {job.id:3}/{job.total:3} - finish - START')
+    if len(blocks) == 0:
+        checksum = chunk.open().close()
+    elif chunk.dataset.sortedByHash:
+        chunk.open(sort=False)
+        runRecords = [_read_shuffle_records(blocks=list(runBlocks), codec=chunk.dataset.codec) for _, runBlocks in groupby(blocks, key=itemgetter(0))]
+        for hashKey, record in heapq.merge(*runRecords, key=itemgetter(0)):
+            chunk.write(record, hashKey=hashKey)
+        checksum = chunk.close()
+    else:
+        checksum = chunk.copy_blocks(blocks=_read_shuffle_blocks(blocks=blocks))
     logger.log(f'{job.parameters["name"]} - {job.id:3}/{job.total:3} - finish - END')
-    return chunk.close()
+    return checksum
+
+
+def _read_shuffle_blocks(blocks):
+    """Reads the blocks of a chunk from the run files, yields ``(compressedData, recordCount, records)`` tuples"""
+    for runFileName, runBlocks in groupby(blocks, key=itemgetter(0)):
+        with open(runFileName, 'rb') as runFile:
+            for _, offset, length, recordCount, records in runBlocks:
+                runFile.seek(offset)
+                yield runFile.read(length), recordCount, records
+
+
+def _read_shuffle_records(blocks, codec):
+    """Reads the records of the blocks of a run file, yields ``(hashKey, record)`` tuples"""
+    for compressedData, _, records in _read_shuffle_blocks(blocks=blocks):
+        data = codec.decompress(compressedData)
+        for hashKey, offset, length in records:
+            yield hashKey, data[offset:offset + length]
+
+
+def _get_temporary_position(name, outputName):
+    """Id of the job and the part that created a temporary dataset, the temporary datasets are named ``{name}_{jobId:03}`` (and ``{name}_{jobId:03}_{part:03}``) so above 999 jobs the names are not in job order"""
+    values = name[len(outputName) + 1:].split('_')
+    return int(values[0]), int(values[1]) if len(values) > 1 else 0
+
+
+def _get_canonical_data(value): # pylint: disable=too-many-return-statements
+    """Converts a member of a task into JSON data that is the same in every process: sets are ordered, dictionary keys are converted to strings, classes and functions are replaced by their name and other objects by their class name and members"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_get_canonical_data(elem) for elem in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_get_canonical_data(elem) for elem in value), key=lambda elem: json.dumps(elem, sort_keys=True))
+    if isinstance(value, dict):
+        return {json.dumps(_get_canonical_data(key), sort_keys=True): _get_canonical_data(elem) for key, elem in value.items()}
+    if inspect.isclass(value) or inspect.isroutine(value):
+        return f'{value.__module__}.{value.__qualname__}'
+    if hasattr(value, '__dict__'):
+        return {'class': _get_canonical_data(value.__class__), 'members': _get_canonical_data(vars(value))}
+    return {'class': _get_canonical_data(value.__class__), 'pickle': pickle.dumps(value, protocol=4).hex()}
+
+
+def _delete_directory(directory):
+    """Deletes the files and the directory of a temporary dataset or a :class:`ShuffleWriter`"""
+    if not os.path.isdir(directory):
+        return
+    for fileName in glob.glob(f'{directory}/*'):
+        os.remove(fileName)
+    os.rmdir(directory)
+
+
+def _save_pickle(fileName, data):
+    """Writes a file in a single step, so a crash never leaves a partially written checkpoint behind"""
+    with open(f'{fileName}.tmp', 'wb') as file:
+        pickle.dump(data, file)
+    os.replace(f'{fileName}.tmp', fileName)
+
+
+def _get_temporary_chunk(filePath, chunk):
+    """Creates the :class:`DataChunk` of a temporary dataset's chunk file for reading"""
+    dataset = chunk.dataset
+    temporaryDataset = Dataset(
+        dataType=dataset.dataType,
+        location=dataset.location,
+        project='temp',
+        branch=f'{dataset.name}_temp',
+        name=Path(filePath).parent.name,
+        chunkCount=dataset.chunkCount,
+        repoData=dataset.repoData,
+        codec=dataset.codec,
+        serializer=dataset.serializer,
+        indexed=dataset.indexed,
+        sortedByHash=dataset.sortedByHash
+    )
+    return DataChunk(dataset=temporaryDataset, chunkId=chunk.chunkId, mode='r')
+
+
+def _get_keyed_values(inputChunk, position):
+    """Yields ``(hashKey, position, object)`` tuples of a chunk in the order of the hashed :term:`hash id`-s, sorts the objects in memory unless the chunk is sorted already"""
+    keyedValues = ((get_hash(value.get_hash_id()), position, value) for value in inputChunk)
+    if not inputChunk.isSorted:
+        yield from sorted(keyedValues, key=itemgetter(0))
+        return
+    previousHashKey = ''
+    for keyedValue in keyedValues:
+        if keyedValue[0] < previousHashKey:
+            raise ValueError(f'{inputChunk.dataset.name} chunk {inputChunk.chunkId} is not sorted by hash')
+        previousHashKey = keyedValue[0]
+        yield keyedValue
+
+
+def _get_temporary_chunk_stats(filePath, chunkId):
+    """Reads the statistics of a temporary chunk from the ``.stats`` file of its dataset"""
+    temporaryDirectory = Path(filePath).parent
+    with open(Path(temporaryDirectory, f'{temporaryDirectory.name}.stats'), 'rt') as statsFile:
+        return json.load(statsFile)['chunks'][chunkId]
+
+
+def _move_temporary_chunk(filePath, chunk, stats):
+    """Moves a temporary chunk file (and its index) into the output dataset, the checksum and the statistics are taken from the temporary dataset's files"""
+    temporaryDirectory = Path(filePath).parent
+    with open(Path(temporaryDirectory, f'{temporaryDirectory.name}.chk'), 'rt') as chkFile:
+        chunk.checksum = json.load(chkFile)[Path(filePath).name]
+    os.replace(filePath, Path(chunk.dataset.directory, chunk.fileName))
+    if chunk.dataset.indexed:
+        os.replace(f'{filePath[:-len(chunk.dataset.fileExtension)]}.idx', Path(chunk.dataset.directory, chunk.indexFileName))
+    chunk.recordCount = stats['recordCount']
+    chunk.rawBytes = stats['rawBytes']
+    chunk.compressedBytes = stats['compressedBytes']
+    chunk.writeTime = stats['writeTime']
+    return DataChunkChecksum(chunk=chunk, value=chunk.checksum)
+
+
+class _SynchronisedWriter:
+    """Wraps the output writer of a job so ``run()`` can append to it from many threads (see ``executor='thread'`` in :class:`Task`)"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.lock = threading.Lock()
+
+    def append(self, elem):
+        with self.lock:
+            self.writer.append(elem)
+
+    def close(self):
+        with self.lock:
+            self.writer.close()
@@ -0,0 +1,68 @@
+import json
+
+from hypergol.chunk_codec import GzipCodec
+from hypergol.chunk_codec import ZstdCodec
+from hypergol.chunk_codec import Lz4Codec
+from hypergol.chunk_codec import NoCodec
+from hypergol.chunk_codec import ChunkCodec
+from hypergol.chunk_codec import UnknownChunkCodecException
+from hypergol.chunk_codec import get_codec
+
+from tests.hypergol_test_case import DataClass1
+from tests.hypergol_test_case import HypergolTestCase
+
+
+class TestChunkCodec(HypergolTestCase):
+
+    def __init__(self, methodName='runTest'):
+        super(TestChunkCodec, self).__init__(
+            location='test_chunk_codec_location',
+            projectName='test_chunk_codec',
+            branch='branch',
+            chunkCount=16,
+            methodName=methodName
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.expectedObjects = {DataClass1(id_=k, value1=k) for k in range(100)}
+        self.datasets = {
+            codec.name: self.datasetFactory.get(dataType=DataClass1, name=f'data_class_{codec.name}', codec=codec)
+            for codec in [GzipCodec(level=1), ZstdCodec(), Lz4Codec(), NoCodec()]
+        }
+
+    def tearDown(self):
+        super().tearDown()
+        for dataset in self.datasets.values():
+            self.delete_if_exists(dataset=dataset)
+        self.clean_directories()
+
+    def test_get_codec_returns_correct_codec(self):
+        self.assertEqual(get_codec(name='gzip', level=1), GzipCodec(level=1))
+        self.assertEqual(get_codec(name='zstd'), ZstdCodec(level=3))
+        self.assertEqual(ChunkCodec.from_data(None), GzipCodec(level=9))
+
+    def test_get_codec_raises_if_unknown_codec(self):
+        with self.assertRaises(UnknownChunkCodecException):
+            get_codec(name='bzip2')
+
+    def test_datasets_are_written_and_read_with_every_codec(self):
+        for name, dataset in self.datasets.items():
+            self.create_test_dataset(dataset=dataset, content=self.expectedObjects)
+            self.assertEqual(dataset.defFile.get_def_file_data()['codec']['name'], name)
+            self.assertSetEqual(set(dataset.open('r')), self.expectedObjects)
+            self.assertEqual(dataset.chkFile.check_chk_file(), True)
+
+    def test_reader_picks_up_codec_from_def_file(self):
+        self.create_test_dataset(dataset=self.datasets['zstd'], content=self.expectedObjects)
+        dataset = self.datasetFactory.get(dataType=DataClass1, name='data_class_zstd')
+        self.assertSetEqual(set(dataset.open('r')), self.expectedObjects)
+        self.assertEqual(dataset.codec, ZstdCodec())
+
+    def test_checksums_do_not_depend_on_codec(self):
+        checksums = set()
+        for dataset in self.datasets.values():
+            self.create_test_dataset(dataset=dataset, content=self.expectedObjects)
+            with open(dataset.chkFile.chkFilename, 'rt') as chkFile:
+                checksums.add(tuple(v for k, v in sorted(json.load(chkFile).items()) if not k.endswith('.def')))
+        self.assertEqual(len(checksums), 1)
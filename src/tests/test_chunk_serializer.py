@@ -0,0 +1,69 @@
+import json
+
+from hypergol.chunk_serializer import JsonSerializer
+from hypergol.chunk_serializer import OrjsonSerializer
+from hypergol.chunk_serializer import MsgpackSerializer
+from hypergol.chunk_serializer import UnknownChunkSerializerException
+from hypergol.chunk_serializer import get_serializer
+
+from tests.hypergol_test_case import DataClass1
+from tests.hypergol_test_case import HypergolTestCase
+
+
+class TestChunkSerializer(HypergolTestCase):
+
+    def __init__(self, methodName='runTest'):
+        super(TestChunkSerializer, self).__init__(
+            location='test_chunk_serializer_location',
+            projectName='test_chunk_serializer',
+            branch='branch',
+            chunkCount=16,
+            methodName=methodName
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.expectedObjects = [DataClass1(id_=k, value1=k) for k in range(100)]
+        self.datasets = {
+            serializer.name: self.datasetFactory.get(dataType=DataClass1, name=f'data_class_{serializer.name}', serializer=serializer)
+            for serializer in [JsonSerializer(), OrjsonSerializer(), MsgpackSerializer()]
+        }
+        self.datasetCopy = self.datasetFactory.get(dataType=DataClass1, name='data_class_copy', serializer='msgpack')
+
+    def tearDown(self):
+        super().tearDown()
+        for dataset in self.datasets.values():
+            self.delete_if_exists(dataset=dataset)
+        self.delete_if_exists(dataset=self.datasetCopy)
+        self.clean_directories()
+
+    def test_get_serializer_raises_if_unknown_serializer(self):
+        with self.assertRaises(UnknownChunkSerializerException):
+            get_serializer(name='pickle')
+
+    def test_serializers_roundtrip(self):
+        data = {'b': [1, 2, {'d': 'x', 'c': None}], 'a': 'é'}
+        for serializer in self.datasets.values():
+            serializer = serializer.serializer
+            self.assertEqual(serializer.loads(serializer.dumps(data)), data)
+
+    def test_serializers_are_deterministic(self):
+        for dataset in self.datasets.values():
+            serializer = dataset.serializer
+            self.assertEqual(serializer.dumps({'a': 1, 'b': {'c': 2, 'd': 3}}), serializer.dumps({'b': {'d': 3, 'c': 2}, 'a': 1}))
+
+    def test_datasets_are_written_and_read_with_every_serializer(self):
+        for name, dataset in self.datasets.items():
+            self.create_test_dataset(dataset=dataset, content=self.expectedObjects)
+            self.assertEqual(dataset.defFile.get_def_file_data()['serializer']['name'], name)
+            self.assertSetEqual(set(self.datasetFactory.get(dataType=DataClass1, name=f'data_class_{name}').open('r')), set(self.expectedObjects))
+            self.assertEqual(dataset.chkFile.check_chk_file(), True)
+
+    def test_checksums_are_stable_for_a_serializer(self):
+        self.create_test_dataset(dataset=self.datasets['msgpack'], content=self.expectedObjects)
+        self.create_test_dataset(dataset=self.datasetCopy, content=self.expectedObjects)
+        checksums = []
+        for dataset in [self.datasets['msgpack'], self.datasetCopy]:
+            with open(dataset.chkFile.chkFilename, 'rt') as chkFile:
+                checksums.append([v for k, v in sorted(json.load(chkFile).items()) if not k.endswith('.def')])
+        self.assertEqual(checksums[0], checksums[1])
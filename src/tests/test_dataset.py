@@ -7,6 +7,8 @@ from hypergol.dataset import DatasetDoesNotExistException
 from hypergol.dataset import DatasetAlreadyExistsException
 from hypergol.dataset_def_file import DatasetDefFileDoesNotMatchException
 from hypergol.datachunk import DatasetTypeDoesNotMatchDataTypeException
+from hypergol.utils import get_hash
+from hypergol.chunk_serializer import get_serializer
 
 from tests.hypergol_test_case import HypergolTestCase
 from tests.hypergol_test_case import DataClass1
@@ -32,11 +34,24 @@ class TestDataset(HypergolTestCase):
             content=self.expectedObjects
         )
         self.datasetNew = self.datasetFactory.get(dataType=DataClass1, name='data_class_new')
+        self.datasetRechunked = self.datasetFactory.get(dataType=DataClass1, name='data_class_rechunked', chunkCount=256, codec='lz4')
+        self.datasetRechunkedBack = self.datasetFactory.get(dataType=DataClass1, name='data_class_rechunked_back', chunkCount=16)
+        self.datasetSorted = self.datasetFactory.get(dataType=DataClass1, name='data_class_sorted', chunkCount=256, sortedByHash=True)
+        self.datasetSortedRechunked = self.datasetFactory.get(dataType=DataClass1, name='data_class_sorted_rechunked', chunkCount=16, sortedByHash=True)
+        self.datasetIndexed = self.create_test_dataset(
+            dataset=self.datasetFactory.get(dataType=DataClass1, name='data_class_indexed', codec='zstd', indexed=True),
+            content=self.expectedObjects
+        )
 
     def tearDown(self):
         super().tearDown()
         self.delete_if_exists(dataset=self.dataset)
         self.delete_if_exists(dataset=self.datasetNew)
+        self.delete_if_exists(dataset=self.datasetRechunked)
+        self.delete_if_exists(dataset=self.datasetRechunkedBack)
+        self.delete_if_exists(dataset=self.datasetSorted)
+        self.delete_if_exists(dataset=self.datasetSortedRechunked)
+        self.delete_if_exists(dataset=self.datasetIndexed)
         self.clean_directories()
 
     def test_dataset_directory_returns_correctly(self):
@@ -115,3 +130,227 @@ class TestDataset(HypergolTestCase):
         with self.assertRaises(DatasetTypeDoesNotMatchDataTypeException):
             with self.datasetNew.open('w') as datasetWriter:
                 datasetWriter.append(DataClass2(id_=0, value2=0))
+
+    def test_indexed_dataset_reader_reads_correctly(self):
+        self.assertSetEqual(set(self.datasetIndexed.open('r')), self.expectedObjects)
+        self.assertEqual(self.datasetIndexed.chkFile.check_chk_file(), True)
+
+    def test_get_returns_object_from_indexed_dataset(self):
+        dataset = self.datasetFactory.get(dataType=DataClass1, name='data_class_indexed')
+        self.assertEqual(dataset.get(hashId=(42, )), DataClass1(id_=42, value1=42))
+        self.assertIsNone(dataset.get(hashId=(1000, )))
+
+    def test_get_many_returns_objects_in_order(self):
+        hashIds = [(k, ) for k in [5, 1000, 3, 77]]
+        expectedObjects = [DataClass1(id_=k, value1=k) for k in [5, 3, 77]]
+        self.assertListEqual(self.datasetIndexed.get_many(hashIds=hashIds), expectedObjects)
+        self.assertListEqual(self.dataset.get_many(hashIds=hashIds), expectedObjects)
+
+    def test_get_many_returns_repeated_ids_once_for_each_occurrence(self):
+        hashIds = [(k, ) for k in [1, 1, 2]]
+        expectedObjects = [DataClass1(id_=k, value1=k) for k in [1, 1, 2]]
+        self.assertListEqual(self.datasetIndexed.get_many(hashIds=hashIds), expectedObjects)
+        self.assertListEqual(self.dataset.get_many(hashIds=hashIds), expectedObjects)
+
+    def test_parallel_dataset_reader_keeps_chunk_order_if_ordered(self):
+        self.assertListEqual(list(self.dataset.open('r', workers=3)), list(self.dataset.open('r')))
+
+    def test_parallel_dataset_reader_reads_correctly_if_unordered(self):
+        objects = list(self.dataset.open('r', workers=3, ordered=False))
+        self.assertEqual(len(objects), len(self.expectedObjects))
+        self.assertSetEqual(set(objects), self.expectedObjects)
+
+    def test_parallel_dataset_reader_stops_workers_if_iteration_stops_early(self):
+        datasetReader = self.dataset.open('r', workers=4)
+        objects = []
+        for value in datasetReader:
+            objects.append(value)
+            if len(objects) == 10:
+                break
+        self.assertListEqual(objects, list(self.dataset.open('r'))[:10])
+
+    def test_data_chunk_prefetch_reads_correctly(self):
+        objects = []
+        for dataChunk in self.dataset.get_data_chunks(mode='r'):
+            dataChunk.open(prefetch=3)
+            objects.extend(dataChunk)
+            dataChunk.close()
+            self.assertIsNone(dataChunk.prefetcher)
+        self.assertListEqual(objects, list(self.dataset.open('r')))
+
+    def test_data_chunk_prefetch_stops_if_closed_early(self):
+        dataChunk = self.dataset.get_data_chunks(mode='r')[0].open(prefetch=1)
+        next(iter(dataChunk))
+        dataChunk.close()
+        self.assertIsNone(dataChunk.file)
+
+    def test_data_chunk_reads_record_range(self):
+        dataChunk = self.dataset.get_data_chunks(mode='r')[0]
+        objects = list(dataChunk.open())
+        dataChunk.close()
+        for recordRange in [(0, 2), (2, 4), (3, None), (10, 20)]:
+            dataChunk.open(prefetch=2 if recordRange[0] == 2 else 0, recordRange=recordRange)
+            self.assertListEqual(list(dataChunk), objects[recordRange[0]:recordRange[1]])
+            dataChunk.close()
+
+    def test_data_chunk_group_reads_record_range(self):
+        self.dataset.rechunk(outputDataset=self.datasetRechunked, threads=2)
+        dataChunkGroup = self.datasetRechunked.get_data_chunk_groups(chunkCount=16)[0]
+        objects = list(dataChunkGroup.open())
+        dataChunkGroup.close()
+        for recordRange in [(0, 2), (2, 5), (1, None), (len(objects), None)]:
+            dataChunkGroup.open(recordRange=recordRange)
+            self.assertListEqual(list(dataChunkGroup), objects[recordRange[0]:recordRange[1]])
+            dataChunkGroup.close()
+
+    def test_dataset_reader_filters_with_where(self):
+        objects = set(self.dataset.open('r', where=lambda data: data['id_'] % 2 == 0))
+        self.assertSetEqual(objects, {value for value in self.expectedObjects if value.id_ % 2 == 0})
+
+    def test_dataset_reader_returns_only_fields(self):
+        values = list(self.dataset.open('r', fields=['value1'], where=lambda data: data['id_'] < 10))
+        self.assertListEqual(sorted(value['value1'] for value in values), list(range(10)))
+        self.assertTrue(all(list(value.keys()) == ['value1'] for value in values))
+
+    def test_parallel_dataset_reader_applies_fields_and_where(self):
+        values = list(self.dataset.open('r', workers=2, fields=['id_'], where=_is_odd))
+        self.assertListEqual(values, list(self.dataset.open('r', fields=['id_'], where=_is_odd)))
+        self.assertEqual(len(values), 50)
+
+    def test_sample_is_deterministic_and_reads_only_overlapping_chunks(self):
+        sample = list(self.dataset.sample(fraction=0.2, seed=1))
+        self.assertListEqual(list(self.dataset.sample(fraction=0.2, seed=1)), sample)
+        self.assertTrue(set(sample) < self.expectedObjects)
+        self.assertLessEqual(len({self.dataset.get_object_chunk_id(value.get_hash_id()) for value in sample}), 5)
+        self.assertNotEqual(set(self.dataset.sample(fraction=0.2, seed=2)), set(sample))
+
+    def test_sample_selects_the_same_objects_from_indexed_dataset(self):
+        self.assertSetEqual(set(self.datasetIndexed.sample(fraction=0.3, seed='x')), set(self.dataset.sample(fraction=0.3, seed='x')))
+        self.assertSetEqual(set(self.dataset.sample(fraction=1)), self.expectedObjects)
+
+    def test_sample_raises_if_fraction_is_invalid(self):
+        with self.assertRaises(ValueError):
+            list(self.dataset.sample(fraction=0))
+
+    def test_head_returns_first_objects(self):
+        self.assertListEqual(list(self.dataset.head(n=5)), list(self.dataset.open('r'))[:5])
+        self.assertEqual(len(list(self.dataset.head(n=1000))), 100)
+
+    def test_len_returns_number_of_objects_from_stats_file(self):
+        self.assertTrue(self.dataset.statsFile.exists())
+        self.assertEqual(len(self.dataset), 100)
+        self.assertEqual(len(self.datasetIndexed), 100)
+
+    def test_stats_match_chunk_contents(self):
+        stats = self.dataset.stats()
+        self.assertEqual(sum(chunkStats['recordCount'] for chunkStats in stats['chunks'].values()), 100)
+        self.assertEqual(sorted(stats['chunks'].keys()), self.dataset.get_chunk_ids())
+        for chunkId, chunkStats in stats['chunks'].items():
+            self.assertEqual(chunkStats['compressedBytes'], os.path.getsize(f'{self.dataset.directory}/{self.dataset.name}_{chunkId}.jsonl.gz'))
+        self.assertGreater(stats['rawBytes'], 0)
+        self.assertGreaterEqual(stats['writeTime'], 0)
+
+    def test_stats_are_calculated_if_stats_file_is_missing(self):
+        stats = self.dataset.stats()
+        os.remove(self.dataset.statsFile.statsFilename)
+        calculatedStats = self.dataset.stats()
+        self.assertEqual(len(self.dataset), 100)
+        self.assertIsNone(calculatedStats['writeTime'])
+        for key in ['recordCount', 'rawBytes', 'compressedBytes']:
+            self.assertEqual(calculatedStats[key], stats[key])
+
+    def test_stats_fails_if_dataset_does_not_exist(self):
+        with self.assertRaises(DatasetDoesNotExistException):
+            self.datasetNew.stats()
+
+    def test_append_adds_a_segment_that_is_read_with_the_existing_data(self):
+        newObjects = {DataClass1(id_=k, value1=k) for k in range(100, 150)}
+        with self.dataset.open('a') as datasetWriter:
+            for value in newObjects:
+                datasetWriter.append(value)
+        self.assertEqual(self.dataset.defFile.get_def_file_data()['segmentCount'], 2)
+        self.assertTrue(os.path.exists(f'{self.dataset.directory}/{self.dataset.name}_0.1.jsonl.gz'))
+        dataset = self.datasetFactory.get(dataType=DataClass1, name='data_class')
+        self.assertSetEqual(set(dataset.open('r')), self.expectedObjects | newObjects)
+        self.assertEqual(len(dataset), 150)
+        self.assertEqual(dataset.chkFile.check_chk_file(), True)
+
+    def test_append_fails_if_dataset_does_not_exist(self):
+        with self.assertRaises(DatasetDoesNotExistException):
+            self.datasetNew.open('a')
+
+    def test_get_finds_objects_in_appended_segments_of_indexed_dataset(self):
+        with self.datasetIndexed.open('a') as datasetWriter:
+            datasetWriter.append(DataClass1(id_=100, value1=200))
+        self.assertEqual(self.datasetIndexed.get(hashId=100), DataClass1(id_=100, value1=200))
+        self.assertEqual(self.datasetIndexed.get(hashId=7), DataClass1(id_=7, value1=7))
+
+    def test_compact_merges_segments(self):
+        newObjects = {DataClass1(id_=k, value1=k) for k in range(100, 150)}
+        for dataset in [self.dataset, self.datasetIndexed]:
+            for value in newObjects:
+                with dataset.open('a') as datasetWriter:
+                    datasetWriter.append(value)
+                    break
+            with dataset.open('a') as datasetWriter:
+                for value in newObjects:
+                    datasetWriter.append(value)
+            stats = dataset.stats()
+            dataset.compact(threads=2)
+            self.assertEqual(dataset.defFile.get_def_file_data()['segmentCount'], 1)
+            self.assertFalse(any('_0.1.' in fileName or '_0.2.' in fileName for fileName in os.listdir(dataset.directory)))
+            self.assertEqual(len(list(dataset.open('r'))), 151)
+            self.assertSetEqual(set(dataset.open('r')), self.expectedObjects | newObjects)
+            self.assertEqual(dataset.stats()['recordCount'], stats['recordCount'])
+            self.assertEqual(dataset.chkFile.check_chk_file(), True)
+        self.assertEqual(self.datasetIndexed.get(hashId=120), DataClass1(id_=120, value1=120))
+
+    def test_rechunk_splits_and_merges_chunks(self):
+        self.dataset.rechunk(outputDataset=self.datasetRechunked, threads=2)
+        self.assertSetEqual(set(self.datasetRechunked.open('r')), self.expectedObjects)
+        self.assertEqual(len(self.datasetRechunked), 100)
+        self.assertEqual(self.datasetRechunked.chkFile.check_chk_file(), True)
+        self.assertEqual(self.datasetRechunked.defFile.get_def_file_data()['dependencies'][0]['name'], 'data_class')
+        self.datasetRechunked.rechunk(outputDataset=self.datasetRechunkedBack, threads=2)
+        self.assertListEqual(sorted(self.datasetRechunkedBack.open('r'), key=lambda value: value.id_), sorted(self.expectedObjects, key=lambda value: value.id_))
+        for chunkId in self.dataset.get_chunk_ids():
+            self.assertEqual(self.datasetRechunkedBack.stats()['chunks'][chunkId]['recordCount'], self.dataset.stats()['chunks'][chunkId]['recordCount'])
+
+    def test_rechunk_indexed_dataset(self):
+        self.datasetRechunked.indexed = True
+        self.datasetIndexed.rechunk(outputDataset=self.datasetRechunked, threads=2)
+        self.assertEqual(self.datasetRechunked.get(hashId=42), DataClass1(id_=42, value1=42))
+        self.assertEqual(len(self.datasetRechunked), 100)
+
+    def _assert_chunks_are_sorted(self, dataset):
+        for chunk in dataset.get_data_chunks(mode='r'):
+            self.assertTrue(chunk.isSorted)
+            hashKeys = [get_hash(value.get_hash_id()) for value in chunk.open()]
+            chunk.close()
+            self.assertListEqual(hashKeys, sorted(hashKeys))
+
+    def test_rechunk_dataset_sorted_by_hash(self):
+        self.create_test_dataset(dataset=self.datasetSorted, content=self.expectedObjects)
+        self.datasetSorted.rechunk(outputDataset=self.datasetSortedRechunked, threads=2)
+        self.assertSetEqual(set(self.datasetSortedRechunked.open('r')), self.expectedObjects)
+        self.assertEqual(self.datasetSortedRechunked.chkFile.check_chk_file(), True)
+        self._assert_chunks_are_sorted(dataset=self.datasetSortedRechunked)
+
+    def test_compact_dataset_sorted_by_hash(self):
+        self.create_test_dataset(dataset=self.datasetSortedRechunked, content={DataClass1(id_=k, value1=k) for k in range(0, 100, 2)})
+        with self.datasetSortedRechunked.open('a') as datasetWriter:
+            for k in range(1, 100, 2):
+                datasetWriter.append(DataClass1(id_=k, value1=k))
+        self.datasetSortedRechunked.compact(threads=2)
+        self.assertSetEqual(set(self.datasetSortedRechunked.open('r')), self.expectedObjects)
+        self.assertEqual(self.datasetSortedRechunked.chkFile.check_chk_file(), True)
+        self._assert_chunks_are_sorted(dataset=self.datasetSortedRechunked)
+
+    def test_rechunk_raises_if_serializers_do_not_match(self):
+        self.datasetRechunked.serializer = get_serializer(name='msgpack')
+        with self.assertRaises(ValueError):
+            self.dataset.rechunk(outputDataset=self.datasetRechunked)
+
+
+def _is_odd(data):
+    return data['id_'] % 2 == 1
@@ -3,6 +3,7 @@ from unittest import TestCase
 from hypergol.dataset import Dataset
 from hypergol.dataset_chk_file import DataSetChkFile
 from hypergol.dataset import DataSetDefFile
+from hypergol.dataset_stats_file import DataSetStatsFile
 from hypergol.dataset import RepoData
 from hypergol.dataset_factory import DatasetFactory
 
@@ -39,10 +40,12 @@ class TestDatasetFactory(TestCase):
             repoData=self.repoData)
         dataset = datasetFactory.get(dataType=DataClass1, name='data_class')
         self.assertEqual(type(dataset), Dataset)
-        expectedParameters = {k: v for k, v in self.expectedDataset.__dict__.items() if k not in ['chkFile', 'defFile']}
-        actualParameters = {k: v for k, v in dataset.__dict__.items() if k not in ['chkFile', 'defFile']}
+        expectedParameters = {k: v for k, v in self.expectedDataset.__dict__.items() if k not in ['chkFile', 'defFile', 'statsFile']}
+        actualParameters = {k: v for k, v in dataset.__dict__.items() if k not in ['chkFile', 'defFile', 'statsFile']}
         self.assertDictContainsSubset(expectedParameters, actualParameters)
         self.assertEqual(type(dataset.chkFile), DataSetChkFile)
         self.assertEqual(dataset.chkFile.dataset, dataset)
         self.assertEqual(type(dataset.defFile), DataSetDefFile)
         self.assertEqual(dataset.defFile.dataset, dataset)
+        self.assertEqual(type(dataset.statsFile), DataSetStatsFile)
+        self.assertEqual(dataset.statsFile.dataset, dataset)
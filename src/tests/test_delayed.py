@@ -0,0 +1,62 @@
+import pickle
+from multiprocessing import Pool
+from unittest import TestCase
+
+from hypergol.delayed import Delayed
+
+
+class ExpensiveResource:
+    createdCount = 0
+
+    def __init__(self, name, size=1):
+        ExpensiveResource.createdCount += 1
+        self.name = name
+        self.size = size
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def _make_resource(delayed):
+    delayed.make()
+    return ExpensiveResource.createdCount
+
+
+class TestDelayed(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        Delayed.clear_cache()
+        ExpensiveResource.createdCount = 0
+
+    def tearDown(self):
+        super().tearDown()
+        Delayed.clear_cache()
+
+    def test_make_creates_new_object_each_time(self):
+        delayed = Delayed(ExpensiveResource, 'name', size=2)
+        self.assertIsNot(delayed.make(), delayed.make())
+        self.assertEqual(ExpensiveResource.createdCount, 2)
+
+    def test_cached_make_reuses_object_with_same_parameters(self):
+        resource = Delayed.cached(ExpensiveResource, 'name', size=2).make()
+        self.assertIs(pickle.loads(pickle.dumps(Delayed.cached(ExpensiveResource, 'name', size=2))).make(), resource)
+        self.assertIsNot(Delayed.cached(ExpensiveResource, 'name', size=3).make(), resource)
+        self.assertEqual(ExpensiveResource.createdCount, 2)
+
+    def test_clear_cache_closes_objects(self):
+        resource = Delayed.cached(ExpensiveResource, 'name').make()
+        Delayed.clear_cache()
+        self.assertTrue(resource.closed)
+        self.assertIsNot(Delayed.cached(ExpensiveResource, 'name').make(), resource)
+
+    def test_cached_objects_are_not_inherited_by_worker_processes(self):
+        Delayed.cached(ExpensiveResource, 'name').make()
+        pool = Pool(2)
+        createdCounts = pool.map(_make_resource, [Delayed.cached(ExpensiveResource, 'name')] * 8, chunksize=1)
+        pool.close()
+        pool.join()
+        pool.terminate()
+        self.assertTrue(all(createdCount == 2 for createdCount in createdCounts))
+        self.assertEqual(ExpensiveResource.createdCount, 1)
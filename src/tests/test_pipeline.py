@@ -1,6 +1,59 @@
+import os
 from unittest import TestCase
 
+from hypergol.job import Job
+from hypergol.task import Task
 from hypergol.pipeline import Pipeline
+from hypergol.pipeline import _get_dependencies
+from hypergol.dataset import DatasetAlreadyExistsException
+
+from tests.hypergol_test_case import DataClass1
+from tests.hypergol_test_case import HypergolTestCase
+from tests.test_task import TaskExample
+from tests.test_task import TaskExample6
+from tests.test_task import OutputDataClass
+
+
+class PickleCountingTask(TaskExample6):
+    pickleCount = 0
+
+    def __getstate__(self):
+        PickleCountingTask.pickleCount += 1
+        return self.__dict__
+
+
+class FailingTask(TaskExample6):
+
+    def get_jobs(self):
+        raise RuntimeError('failed')
+
+
+class ListMemberTask(TaskExample6):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.seenIds = []
+
+    def run(self, data1):
+        self.seenIds.append(data1.id_)
+        self.output.append(DataClass1(id_=data1.id_, value1=len(self.seenIds)))
+
+
+class SourceTask(Task):
+
+    def __init__(self, sampleLength, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sampleLength = sampleLength
+
+    def get_jobs(self):
+        return [Job(id_=k, total=2, parameters={'start': k}) for k in range(2)]
+
+    def source_iterator(self, parameters):
+        for k in range(parameters['start'], self.sampleLength, 2):
+            yield (k, )
+
+    def run(self, k):
+        self.output.append(DataClass1(id_=k, value1=k))
 
 
 class TestDataset(TestCase):
@@ -23,3 +76,171 @@ class TestDataset(TestCase):
         # )
         # pipeline.run(threads=4)
         # print(mockPool)
+
+
+class TestPipeline(HypergolTestCase):
+
+    def __init__(self, methodName='runTest'):
+        super(TestPipeline, self).__init__(
+            location='test_pipeline_location',
+            projectName='test_pipeline',
+            branch='branch',
+            chunkCount=16,
+            methodName=methodName
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.sampleLength = 100
+        self.inputDataset = self.create_test_dataset(
+            dataset=self.datasetFactory.get(dataType=DataClass1, name='data1'),
+            content=[DataClass1(id_=k, value1=k) for k in range(self.sampleLength)]
+        )
+        self.outputDataset1 = self.datasetFactory.get(dataType=OutputDataClass, name='output_data1')
+        self.outputDataset2 = self.datasetFactory.get(dataType=DataClass1, name='output_data2')
+        self.outputDataset3 = self.datasetFactory.get(dataType=DataClass1, name='output_data3')
+
+    def tearDown(self):
+        super().tearDown()
+        self.delete_if_exists(dataset=self.inputDataset)
+        self.delete_if_exists(dataset=self.outputDataset1)
+        self.delete_if_exists(dataset=self.outputDataset2)
+        self.delete_if_exists(dataset=self.outputDataset3)
+        self.clean_directories()
+
+    def _run_pipeline(self, **kwargs):
+        pipeline = Pipeline(
+            tasks=[
+                TaskExample(inputDatasets=[self.inputDataset], outputDataset=self.outputDataset1, repeat=2),
+                TaskExample6(inputDatasets=[self.inputDataset], outputDataset=self.outputDataset2),
+                TaskExample6(inputDatasets=[self.outputDataset2], outputDataset=self.outputDataset3, threads=1)
+            ],
+            **kwargs
+        )
+        pipeline.run(threads=2)
+        self.assertSetEqual(set(self.outputDataset1.open('r')), {OutputDataClass(id_=k, id2=n, value=k) for k in range(self.sampleLength) for n in range(2)})
+        self.assertSetEqual(set(self.outputDataset3.open('r')), {DataClass1(id_=k, value1=4 * k) for k in range(self.sampleLength)})
+        self.assertEqual(self.outputDataset3.chkFile.check_chk_file(), True)
+        self.assertDictEqual(pipeline.exceptions, {'TaskExample': False, 'TaskExample6': False})
+
+    def test_pipeline_runs_tasks_in_shared_pools(self):
+        self._run_pipeline()
+
+    def test_pipeline_runs_tasks_with_forkserver(self):
+        self._run_pipeline(startMethod='forkserver', preload=['hypergol'])
+
+    def test_pipeline_resumes_unfinished_tasks(self):
+        firstTask = TaskExample6(inputDatasets=[self.inputDataset], outputDataset=self.outputDataset2)
+        Pipeline(tasks=[firstTask]).run(threads=2)
+        secondTask = TaskExample6(inputDatasets=[self.outputDataset2], outputDataset=self.outputDataset3)
+        for job in secondTask.get_jobs()[:5]:
+            secondTask.execute(job)
+        with self.assertRaises(DatasetAlreadyExistsException):
+            Pipeline(tasks=[firstTask, secondTask]).run(threads=2)
+        pipeline = Pipeline(tasks=[firstTask, secondTask])
+        pipeline.run(threads=2, resume=True)
+        self.assertDictEqual(pipeline.exceptions, {'TaskExample6': False})
+        self.assertSetEqual(set(self.outputDataset3.open('r')), {DataClass1(id_=k, value1=4 * k) for k in range(self.sampleLength)})
+        self.assertEqual(self.outputDataset3.chkFile.check_chk_file(), True)
+
+    def _get_cached_pipeline(self, repeat, branch='branch'):
+        outputDataset1 = self.datasetFactory.get(dataType=OutputDataClass, name='output_data1', branch=branch)
+        outputDataset2 = self.datasetFactory.get(dataType=DataClass1, name='output_data2', branch=branch)
+        outputDataset3 = self.datasetFactory.get(dataType=DataClass1, name='output_data3', branch=branch)
+        return Pipeline(tasks=[
+            TaskExample(inputDatasets=[self.inputDataset], outputDataset=outputDataset1, repeat=repeat),
+            TaskExample6(inputDatasets=[self.inputDataset], outputDataset=outputDataset2),
+            TaskExample6(inputDatasets=[outputDataset2], outputDataset=outputDataset3)
+        ])
+
+    def _get_creation_times(self, pipeline):
+        return [task.outputDataset.defFile.get_def_file_data()['creationTime'] for task in pipeline.tasks]
+
+    def test_pipeline_with_cache_executes_only_changed_tasks(self):
+        pipeline = self._get_cached_pipeline(repeat=2)
+        pipeline.run(threads=2, cache=True)
+        creationTimes = self._get_creation_times(pipeline=pipeline)
+        pipeline = self._get_cached_pipeline(repeat=2)
+        pipeline.run(threads=2, cache=True)
+        self.assertDictEqual(pipeline.exceptions, {})
+        self.assertListEqual(self._get_creation_times(pipeline=pipeline), creationTimes)
+        pipeline = self._get_cached_pipeline(repeat=3)
+        pipeline.run(threads=2, cache=True)
+        self.assertDictEqual(pipeline.exceptions, {'TaskExample': False})
+        self.assertNotEqual(self._get_creation_times(pipeline=pipeline)[0], creationTimes[0])
+        self.assertListEqual(self._get_creation_times(pipeline=pipeline)[1:], creationTimes[1:])
+        self.assertEqual(len(self.outputDataset1), 3 * self.sampleLength)
+
+    def test_pipeline_with_cache_links_outputs_from_other_branches(self):
+        self._get_cached_pipeline(repeat=2).run(threads=2, cache=True)
+        pipeline = self._get_cached_pipeline(repeat=2, branch='branch2')
+        try:
+            pipeline.run(threads=2, cache=True)
+            self.assertDictEqual(pipeline.exceptions, {})
+            for task in pipeline.tasks:
+                self.assertEqual(task.outputDataset.defFile.get_def_file_data()['cachedFrom'], 'branch')
+                self.assertEqual(task.outputDataset.chkFile.check_chk_file(), True)
+            self.assertEqual(
+                os.stat(f'{pipeline.tasks[2].outputDataset.directory}/output_data3_0.jsonl.gz').st_ino,
+                os.stat(f'{self.outputDataset3.directory}/output_data3_0.jsonl.gz').st_ino
+            )
+            self.assertSetEqual(set(pipeline.tasks[2].outputDataset.open('r')), {DataClass1(id_=k, value1=4 * k) for k in range(self.sampleLength)})
+        finally:
+            for task in pipeline.tasks:
+                self.delete_if_exists(dataset=task.outputDataset)
+            if os.path.exists(f'{self.location}/{self.projectName}/branch2'):
+                os.rmdir(f'{self.location}/{self.projectName}/branch2')
+
+    def test_get_dependencies_finds_tasks_creating_inputs(self):
+        pipeline = self._get_cached_pipeline(repeat=2)
+        self.assertListEqual(_get_dependencies(tasks=pipeline.tasks), [[], [], [1]])
+        self.assertListEqual(_get_dependencies(tasks=list(reversed(pipeline.tasks))), [[], [], []])
+
+    def test_pipeline_skips_tasks_depending_on_failed_tasks(self):
+        pipeline = Pipeline(tasks=[
+            FailingTask(inputDatasets=[self.inputDataset], outputDataset=self.outputDataset2),
+            TaskExample6(inputDatasets=[self.outputDataset2], outputDataset=self.outputDataset3),
+            TaskExample(inputDatasets=[self.inputDataset], outputDataset=self.outputDataset1, repeat=2)
+        ])
+        with self.assertRaises(RuntimeError):
+            pipeline.run(threads=2)
+        self.assertEqual(len(self.outputDataset1), 2 * self.sampleLength)
+        self.assertFalse(self.outputDataset3.exists())
+
+    def test_pipeline_with_streaming_starts_jobs_when_input_chunks_are_merged(self):
+        pipeline = self._get_cached_pipeline(repeat=2)
+        pipeline.run(threads=2, streaming=True)
+        self.assertDictEqual(pipeline.exceptions, {'TaskExample': False, 'TaskExample6': False})
+        self.assertSetEqual(set(self.outputDataset3.open('r')), {DataClass1(id_=k, value1=4 * k) for k in range(self.sampleLength)})
+        self.assertEqual(self.outputDataset3.chkFile.check_chk_file(), True)
+        self.assertEqual(len(self.outputDataset3), self.sampleLength)
+
+    def test_pipeline_with_streaming_runs_source_tasks(self):
+        pipeline = Pipeline(tasks=[
+            SourceTask(outputDataset=self.outputDataset2, sampleLength=self.sampleLength),
+            TaskExample6(inputDatasets=[self.outputDataset2], outputDataset=self.outputDataset3)
+        ])
+        pipeline.run(threads=2, streaming=True)
+        self.assertDictEqual(pipeline.exceptions, {'SourceTask': False, 'TaskExample6': False})
+        self.assertSetEqual(set(self.outputDataset3.open('r')), {DataClass1(id_=k, value1=2 * k) for k in range(self.sampleLength)})
+        self.assertEqual(self.outputDataset3.chkFile.check_chk_file(), True)
+
+    def test_pipeline_with_streaming_skips_tasks_depending_on_failed_tasks(self):
+        pipeline = Pipeline(tasks=[
+            FailingTask(inputDatasets=[self.inputDataset], outputDataset=self.outputDataset2),
+            TaskExample6(inputDatasets=[self.outputDataset2], outputDataset=self.outputDataset3)
+        ])
+        with self.assertRaises(RuntimeError):
+            pipeline.run(threads=2, streaming=True)
+        self.assertFalse(self.outputDataset3.exists())
+
+    def test_pipeline_does_not_pickle_task_for_each_job(self):
+        PickleCountingTask.pickleCount = 0
+        Pipeline(tasks=[PickleCountingTask(inputDatasets=[self.inputDataset], outputDataset=self.outputDataset2)]).run(threads=2)
+        self.assertSetEqual(set(self.outputDataset2.open('r')), {DataClass1(id_=k, value1=2 * k) for k in range(self.sampleLength)})
+        self.assertLess(PickleCountingTask.pickleCount, self.inputDataset.chunkCount)
+
+    def test_pipeline_jobs_do_not_share_task_members(self):
+        Pipeline(tasks=[ListMemberTask(inputDatasets=[self.inputDataset], outputDataset=self.outputDataset2)]).run(threads=1)
+        maxRecordCount = max(chunkStats['recordCount'] for chunkStats in self.inputDataset.stats()['chunks'].values())
+        self.assertEqual(max(value.value1 for value in self.outputDataset2.open('r')), maxRecordCount)
@@ -1,7 +1,13 @@
 import os
+import json
+import asyncio
 import pickle
+import multiprocessing
+from unittest import mock
 
 from hypergol.task import Task
+from hypergol.task import _get_temporary_position
+from hypergol.utils import get_hash
 from hypergol.base_data import BaseData
 from hypergol.dataset import Dataset
 from hypergol.dataset import DatasetAlreadyExistsException
@@ -111,6 +117,80 @@ class TaskExample3(Task):
         ))
 
 
+class TaskExample4(Task):
+
+    def run(self, data1, lstData3):
+        data3 = next(data for data in lstData3 if data.id_ == data1.id_)
+        self.output.append(OutputDataClass(id_=data1.id_, id2=0, value=data1.value1 + data3.value3))
+
+
+class TaskExample5(Task):
+
+    def run(self, data1, data2):
+        self.output.append(OutputDataClass(
+            id_=data1.id_ if data1 is not None else data2.id_,
+            id2=0,
+            value=(data1.value1 if data1 is not None else 0) + (data2.value2 if data2 is not None else 0)
+        ))
+
+
+class TaskExample6(Task):
+
+    def run(self, data1):
+        self.output.append(DataClass1(id_=data1.id_, value1=2 * data1.value1))
+
+
+class TaskExample7(TaskExample):
+
+    def __init__(self, crashId, *args, **kwargs):
+        super(TaskExample7, self).__init__(*args, **kwargs)
+        self.crashId = crashId
+
+    def run(self, inputData):
+        if inputData.id_ == self.crashId:
+            raise RuntimeError('crash')
+        super().run(inputData)
+
+
+class TaskExample8(TaskExample):
+
+    def __init__(self, crashId, *args, **kwargs):
+        super(TaskExample8, self).__init__(*args, **kwargs)
+        self.crashId = crashId
+
+    def run_batch(self, batch):
+        if any(inputData.id_ == self.crashId for inputData, in batch):
+            raise RuntimeError('crash')
+        self.results.setdefault('batchSizes', []).append(len(batch))
+        for inputData, in batch:
+            self.run(inputData)
+
+
+class TaskExample9(TaskExample):
+
+    def init(self):
+        self.results['running'] = 0
+        self.results['maxRunning'] = 0
+
+    async def run(self, inputData):
+        self.results['running'] += 1
+        self.results['maxRunning'] = max(self.results['maxRunning'], self.results['running'])
+        await asyncio.sleep(0.001)
+        self.results['running'] -= 1
+        super().run(inputData)
+
+
+class TaskExample10(TaskExample):
+
+    def __init__(self, labels, *args, **kwargs):
+        super(TaskExample10, self).__init__(*args, **kwargs)
+        self.labels = set(labels)
+
+
+def _get_fingerprint(task):
+    return task.get_fingerprint()
+
+
 class TestTask(HypergolTestCase):
 
     def __init__(self, methodName='runTest'):
@@ -153,6 +233,14 @@ class TestTask(HypergolTestCase):
                 value=self.increment + 1
             ) for k in range(100)}
         self.outputDataset2 = self.datasetFactory.get(dataType=OutputDataClass2, name='output_data2')
+        self.outputDatasetIndexed = self.datasetFactory.get(dataType=OutputDataClass, name='output_data_indexed', indexed=True)
+        self.dataset2Shifted = self.datasetFactory.get(dataType=DataClass2, name='data2_shifted', chunkCount=256, sortedByHash=True)
+        self.outputDatasetSameIds = self.datasetFactory.get(dataType=DataClass1, name='output_data_same_ids', indexed=True)
+        self.outputDatasetSorted = self.datasetFactory.get(dataType=OutputDataClass, name='output_data_sorted', sortedByHash=True)
+        self.outputDatasetShuffled = self.datasetFactory.get(dataType=OutputDataClass, name='output_data_shuffled', indexed=True)
+        self.outputDatasetSortedShuffled = self.datasetFactory.get(dataType=OutputDataClass, name='output_data_sorted_shuffled', sortedByHash=True)
+        self.dataset1Fine = self.datasetFactory.get(dataType=DataClass1, name='data1_fine', chunkCount=256)
+        self.dataset3Fine = self.datasetFactory.get(dataType=DataClass3, name='data3_fine', chunkCount=256, indexed=True)
         self.reversedDataset = self.create_test_dataset(
             dataset=self.datasetFactory.get(dataType=DataClass2, name='rev_data2'),
             content=[DataClass2(id_=k, value2=k) for k in reversed(range(self.sampleLength))]
@@ -165,7 +253,15 @@ class TestTask(HypergolTestCase):
         self.delete_if_exists(dataset=self.dataset3)
         self.delete_if_exists(dataset=self.outputDataset)
         self.delete_if_exists(dataset=self.outputDataset2)
+        self.delete_if_exists(dataset=self.outputDatasetIndexed)
         self.delete_if_exists(dataset=self.reversedDataset)
+        self.delete_if_exists(dataset=self.dataset1Fine)
+        self.delete_if_exists(dataset=self.dataset2Shifted)
+        self.delete_if_exists(dataset=self.outputDatasetSorted)
+        self.delete_if_exists(dataset=self.outputDatasetSameIds)
+        self.delete_if_exists(dataset=self.dataset3Fine)
+        self.delete_if_exists(dataset=self.outputDatasetShuffled)
+        self.delete_if_exists(dataset=self.outputDatasetSortedShuffled)
         for jobId in range(self.dataset1.chunkCount):
             self.delete_if_exists(dataset=Dataset(
                 dataType=OutputDataClass,
@@ -196,6 +292,219 @@ class TestTask(HypergolTestCase):
             jobReports.append(jobReport)
         task.finalise(jobReports=jobReports, threads=3)
         self.assertEqual(set(self.outputDataset.open('r')), self.expectedOutputDataset)
+        self.assertEqual(len(self.outputDataset), len(self.expectedOutputDataset))
+        self.assertEqual(self.outputDataset.chkFile.check_chk_file(), True)
+
+    def test_task_with_prefetch(self):
+        jobReports = []
+        task = TaskExample3(
+            inputDatasets=[self.dataset1, self.dataset2],
+            outputDataset=self.outputDataset2,
+            loadedInputDatasets=[self.dataset3],
+            increment=1,
+            debug=True,
+            prefetch=5
+        )
+        for job in task.get_jobs():
+            taskCopy = pickle.loads(pickle.dumps(task))
+            jobReports.append(taskCopy.execute(job))
+        task.finalise(jobReports=jobReports, threads=3)
+        self.assertEqual(set(self.outputDataset2.open('r')), self.expectedOutputDataset2)
+        self.assertTrue(all('inputWaitTime' in jobReport.statistics for jobReport in jobReports))
+
+    def test_task_with_indexed_output(self):
+        jobReports = []
+        task = TaskExample(
+            inputDatasets=[self.dataset1],
+            outputDataset=self.outputDatasetIndexed,
+            repeat=3,
+            debug=True
+        )
+        for job in task.get_jobs():
+            taskCopy = pickle.loads(pickle.dumps(task))
+            jobReports.append(taskCopy.execute(job))
+        task.finalise(jobReports=jobReports, threads=3)
+        self.assertEqual(set(self.outputDatasetIndexed.open('r')), self.expectedOutputDataset)
+        self.assertEqual(self.outputDatasetIndexed.get(hashId=(7, 2)), OutputDataClass(id_=7, id2=2, value=7))
+        self.assertEqual(len(self.outputDatasetIndexed), len(self.expectedOutputDataset))
+        self.assertEqual(self.outputDatasetIndexed.chkFile.check_chk_file(), True)
+        self.assertTrue(all(len(index.blocks) > 1 for index in self.outputDatasetIndexed.get_data_chunks(mode='r')[0].load_index()))
+
+    def test_task_with_loaded_dataset_with_more_chunks(self):
+        self.create_test_dataset(dataset=self.dataset3Fine, content=[DataClass3(id_=k, value3=k) for k in range(self.sampleLength)])
+        jobReports = []
+        task = TaskExample3(
+            inputDatasets=[self.dataset1, self.dataset2],
+            outputDataset=self.outputDataset2,
+            loadedInputDatasets=[self.dataset3Fine],
+            increment=1,
+            debug=True,
+            prefetch=5
+        )
+        jobs = task.get_jobs()
+        self.assertEqual(len(jobs), 16)
+        self.assertListEqual([chunk.chunkId for chunk in jobs[10].loadedInputChunks[0].dataChunks], [f'a{k:x}' for k in range(16)])
+        for job in jobs:
+            taskCopy = pickle.loads(pickle.dumps(task))
+            jobReports.append(taskCopy.execute(job))
+        task.finalise(jobReports=jobReports, threads=3)
+        self.assertEqual(set(self.outputDataset2.open('r')), self.expectedOutputDataset2)
+
+    def test_task_with_input_dataset_with_more_chunks(self):
+        self.create_test_dataset(dataset=self.dataset1Fine, content=[DataClass1(id_=k, value1=k) for k in range(self.sampleLength)])
+        jobReports = []
+        task = TaskExample4(
+            inputDatasets=[self.dataset1Fine],
+            outputDataset=self.outputDataset,
+            loadedInputDatasets=[self.dataset3],
+            debug=True,
+            prefetch=5
+        )
+        for job in task.get_jobs():
+            taskCopy = pickle.loads(pickle.dumps(task))
+            jobReports.append(taskCopy.execute(job))
+        task.finalise(jobReports=jobReports, threads=3)
+        self.assertEqual(len(jobReports), 16)
+        self.assertEqual(set(self.outputDataset.open('r')), {OutputDataClass(id_=k, id2=0, value=2 * k) for k in range(self.sampleLength)})
+
+    def _run_task(self, task):
+        jobReports = []
+        for job in task.get_jobs():
+            taskCopy = pickle.loads(pickle.dumps(task))
+            jobReports.append(taskCopy.execute(job))
+        task.finalise(jobReports=jobReports, threads=3)
+
+    def test_task_joins_inputs_by_hash_id(self):
+        self.create_test_dataset(dataset=self.dataset2Shifted, content=[DataClass2(id_=k, value2=k) for k in range(50, 150)])
+        expectedValues = {
+            'inner': {OutputDataClass(id_=k, id2=0, value=2 * k) for k in range(50, 100)},
+            'left': {OutputDataClass(id_=k, id2=0, value=2 * k if k >= 50 else k) for k in range(100)},
+            'outer': {OutputDataClass(id_=k, id2=0, value=2 * k if 50 <= k < 100 else k) for k in range(150)}
+        }
+        for join, expectedValue in expectedValues.items():
+            self.delete_if_exists(dataset=self.outputDataset)
+            self._run_task(task=TaskExample5(
+                inputDatasets=[self.dataset1, self.dataset2Shifted],
+                outputDataset=self.outputDataset,
+                join=join,
+                debug=True
+            ))
+            self.assertSetEqual(set(self.outputDataset.open('r')), expectedValue)
+
+    def test_finalise_moves_chunks_created_by_a_single_job(self):
+        jobReports = []
+        task = TaskExample6(inputDatasets=[self.dataset1], outputDataset=self.outputDatasetSameIds, debug=True)
+        for job in task.get_jobs():
+            jobReports.append(pickle.loads(pickle.dumps(task)).execute(job))
+        temporaryDataset = task._get_temporary_dataset(jobId=10)
+        inode = os.stat(f'{temporaryDataset.directory}/{temporaryDataset.name}_a.jsonl.gz').st_ino
+        task.finalise(jobReports=jobReports, threads=3)
+        self.assertEqual(os.stat(f'{self.outputDatasetSameIds.directory}/output_data_same_ids_a.jsonl.gz').st_ino, inode)
+        self.assertSetEqual(set(self.outputDatasetSameIds.open('r')), {DataClass1(id_=k, value1=2 * k) for k in range(self.sampleLength)})
+        self.assertEqual(self.outputDatasetSameIds.get(hashId=7), DataClass1(id_=7, value1=14))
+        self.assertEqual(len(self.outputDatasetSameIds), self.sampleLength)
+        self.assertEqual(self.outputDatasetSameIds.chkFile.check_chk_file(), True)
+
+    def test_task_raises_if_join_mode_is_invalid(self):
+        with self.assertRaises(ValueError):
+            TaskExample5(inputDatasets=[self.dataset1, self.dataset2], outputDataset=self.outputDataset, join='cross')
+
+    def test_task_with_output_sorted_by_hash(self):
+        self._run_task(task=TaskExample(inputDatasets=[self.dataset1], outputDataset=self.outputDatasetSorted, repeat=3, debug=True))
+        self.assertSetEqual(set(self.outputDatasetSorted.open('r')), self.expectedOutputDataset)
+        for chunk in self.outputDatasetSorted.get_data_chunks(mode='r'):
+            self.assertTrue(chunk.isSorted)
+            hashKeys = [get_hash(value.get_hash_id()) for value in chunk.open()]
+            chunk.close()
+            self.assertListEqual(hashKeys, sorted(hashKeys))
+
+    def test_task_with_output_sorted_by_hash_spills_sorted_runs(self):
+        self._run_task(task=TaskExample(inputDatasets=[self.dataset1], outputDataset=self.outputDatasetSorted, repeat=3, debug=True))
+        with mock.patch('hypergol.datachunk.SORT_BUFFER_SIZE', 100):
+            self._run_task(task=TaskExample(inputDatasets=[self.dataset1], outputDataset=self.outputDatasetSortedShuffled, repeat=3, debug=True))
+        self.assertDictEqual(self._get_chunk_checksums(dataset=self.outputDatasetSortedShuffled), self._get_chunk_checksums(dataset=self.outputDatasetSorted))
+        self.assertFalse(any('.run' in fileName for fileName in os.listdir(self.outputDatasetSortedShuffled.directory)))
+
+    def _get_chunk_checksums(self, dataset):
+        chkFileData = json.loads(open(dataset.chkFile.chkFilename, 'rt').read())
+        return {fileName[len(dataset.name):]: checksum for fileName, checksum in chkFileData.items() if not fileName.endswith('.def')}
+
+    def test_task_with_shuffle_creates_identical_chunks(self):
+        for outputDataset, shuffledDataset in [(self.outputDatasetIndexed, self.outputDatasetShuffled), (self.outputDatasetSorted, self.outputDatasetSortedShuffled)]:
+            self._run_task(task=TaskExample(inputDatasets=[self.dataset1], outputDataset=outputDataset, repeat=3, debug=True))
+            self._run_task(task=TaskExample(inputDatasets=[self.dataset1], outputDataset=shuffledDataset, repeat=3, debug=True, shuffle=200))
+            self.assertDictEqual(self._get_chunk_checksums(dataset=shuffledDataset), self._get_chunk_checksums(dataset=outputDataset))
+            self.assertEqual(shuffledDataset.chkFile.check_chk_file(), True)
+            self.assertSetEqual(set(shuffledDataset.open('r')), self.expectedOutputDataset)
+            self.assertEqual(len(shuffledDataset), len(self.expectedOutputDataset))
+            self.assertFalse(os.path.exists(f'{self.location}/temp/{shuffledDataset.name}_temp'))
+        self.assertEqual(self.outputDatasetShuffled.get(hashId=(7, 1)), OutputDataClass(id_=7, id2=1, value=7))
+
+    def test_task_with_split_jobs_creates_identical_chunks(self):
+        self._run_task(task=TaskExample(inputDatasets=[self.dataset1], outputDataset=self.outputDatasetIndexed, repeat=3, debug=True))
+        task = TaskExample(inputDatasets=[self.dataset1], outputDataset=self.outputDatasetShuffled, repeat=3, debug=True, splitSize=2)
+        jobs = task.get_jobs()
+        self.assertGreater(len(jobs), self.dataset1.chunkCount)
+        self.assertEqual(sum(job.recordCount for job in jobs), self.sampleLength)
+        self.assertTrue(all(job.recordCount <= 2 for job in jobs))
+        self._run_task(task=task)
+        self.assertDictEqual(self._get_chunk_checksums(dataset=self.outputDatasetShuffled), self._get_chunk_checksums(dataset=self.outputDatasetIndexed))
+        self.assertEqual(len(self.outputDatasetShuffled), len(self.expectedOutputDataset))
+        self.assertEqual(self.outputDatasetShuffled.get(hashId=(7, 1)), OutputDataClass(id_=7, id2=1, value=7))
+
+    def test_task_raises_if_split_jobs_are_joined(self):
+        with self.assertRaises(ValueError):
+            TaskExample5(inputDatasets=[self.dataset1, self.dataset2], outputDataset=self.outputDataset, join='inner', splitSize=10)
+
+    def test_temporary_chunks_are_merged_in_job_order(self):
+        names = ['output_data_1000', 'output_data_999', 'output_data_012_002', 'output_data_012', 'output_data_001']
+        self.assertListEqual(sorted(names, key=lambda name: _get_temporary_position(name=name, outputName='output_data')), [
+            'output_data_001', 'output_data_012', 'output_data_012_002', 'output_data_999', 'output_data_1000'
+        ])
+
+    def test_task_resumes_job_from_checkpoint(self):
+        self._run_task(task=TaskExample(inputDatasets=[self.dataset1], outputDataset=self.outputDatasetIndexed, repeat=3, debug=True))
+        task = TaskExample7(inputDatasets=[self.dataset1], outputDataset=self.outputDatasetShuffled, repeat=3, debug=True, checkpointEvery=2, crashId=None)
+        jobs = task.get_jobs()
+        job = max(jobs, key=lambda job: job.recordCount)
+        crashingTask = pickle.loads(pickle.dumps(task))
+        crashingTask.crashId = [value.id_ for value in job.inputChunks[0].open()][4]
+        job.inputChunks[0].close()
+        with self.assertRaises(RuntimeError):
+            crashingTask.execute(job)
+        self.assertEqual(len(task._get_temporary_datasets()), 3)
+        self.assertDictEqual(task.get_finished_job_reports(jobs=jobs), {})
+        jobReports = [pickle.loads(pickle.dumps(task)).execute(job) for job in jobs]
+        self.assertEqual(len(task._get_temporary_datasets()), len(jobs) + sum(job.recordCount // 2 for job in jobs))
+        task.finalise(jobReports=jobReports, threads=3)
+        self.assertDictEqual(self._get_chunk_checksums(dataset=self.outputDatasetShuffled), self._get_chunk_checksums(dataset=self.outputDatasetIndexed))
+        self.assertEqual(len(self.outputDatasetShuffled), len(self.expectedOutputDataset))
+
+    def test_task_without_stats_file_is_finished(self):
+        task = TaskExample(inputDatasets=[self.dataset1], outputDataset=self.outputDataset, repeat=3, debug=True)
+        self._run_task(task=task)
+        os.remove(self.outputDataset.statsFile.statsFilename)
+        self.assertTrue(task.is_finished())
+        with self.assertRaises(DatasetAlreadyExistsException):
+            task.get_finished_job_reports(jobs=task.get_jobs())
+        self.assertSetEqual(set(self.outputDataset.open('r')), self.expectedOutputDataset)
+
+    def test_get_finished_job_reports_deletes_failed_jobs(self):
+        task = TaskExample(inputDatasets=[self.dataset1], outputDataset=self.outputDataset, repeat=3, debug=True)
+        jobs = task.get_jobs()
+        for job in jobs[:10]:
+            pickle.loads(pickle.dumps(task)).execute(job)
+        os.remove(f'{task._get_temporary_dataset(jobId=3).directory}/{self.outputDataset.name}_003_0.jsonl.gz')
+        jobReports = task.get_finished_job_reports(jobs=jobs)
+        self.assertListEqual(sorted(jobReports.keys()), [k for k in range(10) if k != 3])
+        self.assertFalse(os.path.exists(task._get_temporary_dataset(jobId=3).directory))
+        for job in jobs:
+            if job.id not in jobReports:
+                jobReports[job.id] = pickle.loads(pickle.dumps(task)).execute(job)
+        task.finalise(jobReports=[jobReports[job.id] for job in jobs], threads=3)
+        self.assertSetEqual(set(self.outputDataset.open('r')), self.expectedOutputDataset)
+        self.assertTrue(task.is_finished())
+        self.assertFalse(os.path.exists(task.temporaryDatasetFactory.branchDirectory))
 
     def test_execute_throws_error_if_ids_do_not_match(self):
         jobReports = []
@@ -229,6 +538,57 @@ class TestTask(HypergolTestCase):
         task.finalise(jobReports=jobReports, threads=3)
         self.assertEqual(set(self.outputDataset2.open('r')), self.expectedOutputDataset2)
 
+    def test_task_with_batches(self):
+        jobReports = []
+        task = TaskExample8(inputDatasets=[self.dataset1], outputDataset=self.outputDataset, repeat=3, debug=True, batchSize=4, crashId=None)
+        for job in task.get_jobs():
+            jobReports.append(pickle.loads(pickle.dumps(task)).execute(job))
+        task.finalise(jobReports=jobReports, threads=3)
+        self.assertSetEqual(set(self.outputDataset.open('r')), self.expectedOutputDataset)
+        self.assertTrue(all(max(jobReport.results['batchSizes']) <= 4 for jobReport in jobReports))
+        self.assertEqual(sum(sum(jobReport.results['batchSizes']) for jobReport in jobReports), self.sampleLength)
+
+    def test_task_with_batches_logs_exceptions_for_each_batch(self):
+        jobReports = []
+        task = TaskExample8(inputDatasets=[self.dataset1], outputDataset=self.outputDataset, repeat=3, batchSize=100, crashId=0)
+        for job in task.get_jobs():
+            jobReports.append(pickle.loads(pickle.dumps(task)).execute(job))
+        task.finalise(jobReports=jobReports, threads=3)
+        crashedJobReports = [jobReport for jobReport in jobReports if jobReport.exceptions]
+        self.assertEqual(len(crashedJobReports), 1)
+        self.assertNotIn('batchSizes', crashedJobReports[0].results)
+        self.assertEqual(len(self.outputDataset), self.repeat * (self.sampleLength - sum(job.recordCount for job in task.get_jobs() if job.id == crashedJobReports[0].jobId)))
+
+    def test_task_with_threads_creates_identical_chunks(self):
+        self._run_task(task=TaskExample(inputDatasets=[self.dataset1], outputDataset=self.outputDatasetSorted, repeat=3, debug=True))
+        self._run_task(task=TaskExample(inputDatasets=[self.dataset1], outputDataset=self.outputDatasetSortedShuffled, repeat=3, debug=True, executor='thread', concurrency=4, checkpointEvery=3))
+        self.assertDictEqual(self._get_chunk_checksums(dataset=self.outputDatasetSortedShuffled), self._get_chunk_checksums(dataset=self.outputDatasetSorted))
+
+    def test_task_with_asyncio_runs_concurrently(self):
+        jobReports = []
+        task = TaskExample9(inputDatasets=[self.dataset1], outputDataset=self.outputDataset, repeat=3, debug=True, executor='asyncio', concurrency=3)
+        for job in task.get_jobs():
+            jobReports.append(pickle.loads(pickle.dumps(task)).execute(job))
+        task.finalise(jobReports=jobReports, threads=3)
+        self.assertSetEqual(set(self.outputDataset.open('r')), self.expectedOutputDataset)
+        self.assertEqual(max(jobReport.results['maxRunning'] for jobReport in jobReports), 3)
+
+    def test_task_raises_if_executor_is_invalid(self):
+        with self.assertRaises(ValueError):
+            TaskExample(inputDatasets=[self.dataset1], outputDataset=self.outputDataset, repeat=3, executor='fiber')
+        with self.assertRaises(ValueError):
+            TaskExample(inputDatasets=[self.dataset1], outputDataset=self.outputDataset, repeat=3, executor='asyncio')
+
+    def test_fingerprint_is_the_same_in_every_process(self):
+        task = TaskExample10(labels=[f'label{k}' for k in range(20)], inputDatasets=[self.dataset1], outputDataset=self.outputDataset, repeat=3)
+        fingerprints = set()
+        for seed in ['1', '2', '3']:
+            with mock.patch.dict(os.environ, {'PYTHONHASHSEED': seed}):
+                with multiprocessing.get_context('spawn').Pool(1) as pool:
+                    fingerprints.add(pool.apply(_get_fingerprint, (task, )))
+        self.assertEqual(len(fingerprints), 1)
+        self.assertIn(task.get_fingerprint(), fingerprints)
+
     def test_check_if_output_exists_raises_if_dataset_already_exists(self):
         task = TaskExample(
             inputDatasets=[self.dataset1],